@@ -0,0 +1,197 @@
+# audio_cache.py
+# Path: /root/piper/app/audio_cache.py
+# LRU caches of synthesized audio: in memory, and optionally on disk
+
+import asyncio
+import hashlib
+import os
+import tempfile
+import time
+from collections import OrderedDict
+from pathlib import Path
+from typing import List, Optional
+
+from log_config import get_logger
+
+logger = get_logger(__name__)
+
+# Temp files older than this were left behind by interrupted writes. Younger ones
+# may belong to another uvicorn worker or process writing into the same directory
+STALE_TEMP_SECONDS = 3600
+
+
+class AudioCache:
+    """
+    LRU cache of complete audio (MP3 or PCM) keyed by synthesis parameters,
+    bounded by number of entries and by total size.
+
+    Only accessed from the event loop, so no locking is needed.
+    """
+
+    def __init__(self, max_entries: int = 512, max_bytes: int = 100 * 1024 * 1024):
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self._entries: "OrderedDict[bytes, bytes]" = OrderedDict()
+        self._total_bytes = 0
+
+    @staticmethod
+    def make_key(
+        voice_key: str,
+        text: str,
+        speed: float,
+        speaker_id: int,
+        audio_format: str = "mp3",
+        bitrate: str = "",
+    ) -> bytes:
+        """Hash the parameters that determine the synthesized audio"""
+        digest = hashlib.blake2b(digest_size=16)
+        digest.update(
+            f"{voice_key}|{speed:.3f}|{speaker_id}|{audio_format}|{bitrate}|".encode("utf-8")
+        )
+        digest.update(text.encode("utf-8"))
+        return digest.digest()
+
+    def get(self, key: bytes) -> Optional[bytes]:
+        """Get cached audio and mark it as recently used"""
+        audio = self._entries.get(key)
+        if audio is not None:
+            self._entries.move_to_end(key)
+        return audio
+
+    def put(self, key: bytes, audio: bytes) -> None:
+        """Store audio, evicting the least recently used entries"""
+        if self.max_entries <= 0 or not audio or len(audio) > self.max_bytes:
+            return
+        previous = self._entries.pop(key, None)
+        if previous is not None:
+            self._total_bytes -= len(previous)
+        self._entries[key] = audio
+        self._total_bytes += len(audio)
+        while len(self._entries) > self.max_entries or self._total_bytes > self.max_bytes:
+            _, evicted = self._entries.popitem(last=False)
+            self._total_bytes -= len(evicted)
+
+    def clear(self) -> None:
+        """Drop all cached audio"""
+        self._entries.clear()
+        self._total_bytes = 0
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+
+class DiskAudioCache:
+    """
+    LRU cache of complete audio stored as one file per entry, bounded by
+    total size. Entries survive restarts; the LRU order is kept in the file
+    modification times.
+
+    The index is only accessed from the event loop; file I/O runs in worker
+    threads.
+    """
+
+    def __init__(self, cache_dir: Path, max_bytes: int):
+        self.cache_dir = cache_dir
+        self.max_bytes = max_bytes
+        self._sizes: "OrderedDict[str, int]" = OrderedDict()  # file name -> size
+        self._total_bytes = 0
+
+    def load(self) -> None:
+        """Create the cache directory and index existing entries, oldest first"""
+        self.cache_dir.mkdir(parents=True, exist_ok=True)
+        entries = []
+        stale_before = time.time() - STALE_TEMP_SECONDS
+        for path in self.cache_dir.iterdir():
+            try:
+                stat = path.stat()
+            except OSError:
+                continue  # Renamed or removed by another writer meanwhile
+            if path.suffix == ".tmp":
+                if stat.st_mtime < stale_before:
+                    path.unlink(missing_ok=True)
+            elif path.is_file():
+                entries.append((stat.st_mtime, path.name, stat.st_size))
+        for _, name, size in sorted(entries):
+            self._sizes[name] = size
+            self._total_bytes += size
+        self._unlink(self._evict())
+        logger.info(
+            "Disk audio cache loaded",
+            extra={
+                "cache_dir": str(self.cache_dir),
+                "entries": len(self._sizes),
+                "size_bytes": self._total_bytes,
+            },
+        )
+
+    async def get(self, key: bytes) -> Optional[bytes]:
+        """Read cached audio and mark it as recently used"""
+        name = key.hex()
+        if name not in self._sizes:
+            return None
+        self._sizes.move_to_end(name)
+        try:
+            return await asyncio.to_thread(self._read, self.cache_dir / name)
+        except OSError as e:
+            logger.warning(
+                "Failed to read cached audio",
+                extra={"file": name, "error": str(e)},
+            )
+            self._total_bytes -= self._sizes.pop(name, 0)
+            return None
+
+    async def put(self, key: bytes, audio: bytes) -> None:
+        """Write audio to the cache, evicting the least recently used entries"""
+        name = key.hex()
+        if not audio or len(audio) > self.max_bytes or name in self._sizes:
+            return
+        try:
+            await asyncio.to_thread(self._write, self.cache_dir / name, audio)
+        except OSError as e:
+            logger.warning(
+                "Failed to write cached audio",
+                extra={"file": name, "error": str(e)},
+            )
+            return
+        # Indexed once the file exists, so a concurrent get never misses it
+        if name not in self._sizes:
+            self._sizes[name] = len(audio)
+            self._total_bytes += len(audio)
+        evicted = self._evict()
+        if evicted:
+            await asyncio.to_thread(self._unlink, evicted)
+
+    def _evict(self) -> List[Path]:
+        """Drop least recently used entries from the index until it fits"""
+        evicted = []
+        while self._total_bytes > self.max_bytes and self._sizes:
+            name, size = self._sizes.popitem(last=False)
+            self._total_bytes -= size
+            evicted.append(self.cache_dir / name)
+        return evicted
+
+    @staticmethod
+    def _read(path: Path) -> bytes:
+        data = path.read_bytes()
+        os.utime(path)  # Recently used after a restart, too
+        return data
+
+    @staticmethod
+    def _write(path: Path, audio: bytes) -> None:
+        # Write to a temporary file first so readers never see partial audio
+        fd, tmp_path = tempfile.mkstemp(dir=path.parent, suffix=".tmp")
+        try:
+            with os.fdopen(fd, "wb") as f:
+                f.write(audio)
+            os.replace(tmp_path, path)
+        except BaseException:
+            os.unlink(tmp_path)
+            raise
+
+    @staticmethod
+    def _unlink(paths: List[Path]) -> None:
+        for path in paths:
+            path.unlink(missing_ok=True)
+
+    def __len__(self) -> int:
+        return len(self._sizes)
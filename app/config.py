@@ -3,12 +3,15 @@
 # Configuration and data models for Piper TTS with hierarchical voice structure
 
 import os
-import json
+import hashlib
+import ipaddress
 from pathlib import Path
-from typing import Dict, List, Optional, Any
+from typing import Dict, FrozenSet, List, Optional, Any, Tuple, Union
 from dataclasses import dataclass, field
 from enum import Enum
 
+import orjson
+
 from log_config import get_logger
 
 logger = get_logger(__name__)
@@ -32,8 +35,19 @@ class Quality(str, Enum):
 # Quality priority for auto-selection (best first)
 QUALITY_PRIORITY = [Quality.HIGH, Quality.MEDIUM, Quality.LOW, Quality.X_LOW]
 
+# Enum value lists for validation errors and listings (read-only, shared)
+GENDER_VALUES = [g.value for g in Gender]
+QUALITY_VALUES = [q.value for q in Quality]
+
+# Enum lookup by value, avoids raising ValueError on unknown input
+GENDER_BY_VALUE: Dict[str, Gender] = {g.value: g for g in Gender}
+QUALITY_BY_VALUE: Dict[str, Quality] = {q.value: q for q in Quality}
+
+# Suffix of INT8 model copies written by quantize_models.py (voice.onnx -> voice.int8.onnx)
+INT8_MODEL_SUFFIX = ".int8.onnx"
 
-@dataclass
+
+@dataclass(slots=True)
 class VoiceVariant:
     """
     A specific voice variant (quality level).
@@ -45,14 +59,14 @@ class VoiceVariant:
     sample_rate: int = 22050
     num_speakers: int = 1
     speaker_id_map: Dict[str, int] = field(default_factory=dict)
+    # Full voice key from the model file name (e.g., en_US-lessac-high)
+    full_key: str = field(init=False, repr=False)
 
-    @property
-    def full_key(self) -> str:
-        """Get the full voice key from model file name"""
-        return Path(self.model_file).stem
+    def __post_init__(self):
+        self.full_key = Path(self.model_file).stem
 
 
-@dataclass
+@dataclass(slots=True)
 class Voice:
     """
     A voice identity (e.g., lessac, ryan, thorsten).
@@ -63,6 +77,8 @@ class Voice:
     gender: Gender
     variants: Dict[Quality, VoiceVariant] = field(default_factory=dict)
     description: str = ""
+    # Quality values in priority order, precomputed at catalog load
+    quality_values: List[str] = field(default_factory=list, repr=False)
 
     @property
     def available_qualities(self) -> List[Quality]:
@@ -84,7 +100,7 @@ class Voice:
         return self.variants.get(best) if best else None
 
 
-@dataclass
+@dataclass(slots=True)
 class Locale:
     """
     A locale/accent (e.g., US, GB for English).
@@ -93,6 +109,8 @@ class Locale:
     code: str  # Locale code (e.g., "US", "GB", "DE")
     name: str  # Display name (e.g., "United States", "United Kingdom")
     voices: Dict[str, Voice] = field(default_factory=dict)  # voice_name -> Voice
+    # gender value -> voice names, precomputed at catalog load
+    voice_names_by_gender: Dict[str, List[str]] = field(default_factory=dict, repr=False)
 
     @property
     def voices_by_gender(self) -> Dict[Gender, List[Voice]]:
@@ -118,7 +136,24 @@ class Locale:
         return voices[0] if voices else None
 
 
-@dataclass
+@dataclass(slots=True, frozen=True)
+class FlatVoiceEntry:
+    """
+    A voice in the flat voice list (/piper/tts/voices).
+    Serialized by orjson as an object with these fields.
+    """
+    language: str
+    language_name: str
+    locale: str
+    locale_name: str
+    voice: str
+    display_name: str
+    gender: str
+    qualities: List[str]
+    key: str  # Voice key without quality (e.g., "en_US-lessac")
+
+
+@dataclass(slots=True)
 class Language:
     """
     A language (e.g., English, German, Persian).
@@ -249,6 +284,15 @@ class VoiceCatalog:
     def __init__(self):
         self.languages: Dict[str, Language] = {}
         self._voice_key_map: Dict[str, tuple] = {}  # full_key -> (lang, locale, voice, quality)
+        # Listings precomputed at load time (the catalog is read-only afterwards)
+        self._languages_list: List[Dict[str, Any]] = []
+        self._voices_flat: List[FlatVoiceEntry] = []
+        self._full_catalog: Dict[str, Any] = {}
+        # Sorted language codes and the "language not found" hint built from them
+        self.language_codes: List[str] = []
+        self.language_hint: str = ""
+        # Hash of the loaded voice index, changes whenever the catalog content does
+        self.version: str = ""
 
     def load_from_index(self, index_path: str) -> bool:
         """
@@ -275,12 +319,11 @@ class VoiceCatalog:
         }
         """
         try:
-            with open(index_path, 'r', encoding='utf-8') as f:
-                data = json.load(f)
+            raw = Path(index_path).read_bytes()
+            data = orjson.loads(raw)
 
-            # Clear existing
-            self.languages.clear()
-            self._voice_key_map.clear()
+            # Build the new catalog off to the side; a failed load keeps the current one
+            catalog = VoiceCatalog()
 
             languages_data = data.get("languages", {})
 
@@ -312,7 +355,7 @@ class VoiceCatalog:
                     for voice_name, voice_data in voices_data.items():
                         # Determine gender from voice data or name heuristics
                         gender_str = voice_data.get("gender", "neutral").lower()
-                        gender = Gender(gender_str) if gender_str in [g.value for g in Gender] else Gender.NEUTRAL
+                        gender = GENDER_BY_VALUE.get(gender_str, Gender.NEUTRAL)
 
                         voice = Voice(
                             name=voice_name,
@@ -324,11 +367,10 @@ class VoiceCatalog:
                         qualities_data = voice_data.get("qualities", {})
 
                         for quality_str, variant_data in qualities_data.items():
-                            try:
-                                quality = Quality(quality_str)
-                            except ValueError:
+                            quality = QUALITY_BY_VALUE.get(quality_str)
+                            if quality is None:
                                 logger.warning(
-                                    f"Unknown quality level in voice index",
+                                    "Unknown quality level in voice index",
                                     extra={
                                         "quality": quality_str,
                                         "voice": voice_name,
@@ -351,7 +393,7 @@ class VoiceCatalog:
 
                             # Build reverse lookup
                             full_key = f"{lang_code}_{locale_code}-{voice_name}-{quality_str}"
-                            self._voice_key_map[full_key] = (lang_code, locale_code, voice_name, quality)
+                            catalog._voice_key_map[full_key] = (lang_code, locale_code, voice_name, quality)
 
                         if voice.variants:
                             locale.voices[voice_name] = voice
@@ -361,17 +403,10 @@ class VoiceCatalog:
 
                 if language.locales:
                     language.default_locale = first_locale
-                    self.languages[lang_code] = language
-
-            logger.info(
-                "Voice catalog loaded",
-                extra={
-                    "languages_count": len(self.languages),
-                    "voices_count": self.total_voices,
-                    "index_path": index_path,
-                },
-            )
-            return True
+                    catalog.languages[lang_code] = language
+
+            catalog._build_listings()
+            catalog.version = hashlib.blake2b(raw, digest_size=8).hexdigest()
 
         except Exception as e:
             logger.error(
@@ -380,6 +415,79 @@ class VoiceCatalog:
             )
             return False
 
+        # Publish every structure of the new catalog in one step (no awaits in
+        # between), so requests never see a partially loaded catalog
+        self.__dict__.update(catalog.__dict__)
+
+        logger.info(
+            "Voice catalog loaded",
+            extra={
+                "languages_count": len(self.languages),
+                "voices_count": self.total_voices,
+                "index_path": index_path,
+            },
+        )
+        return True
+
+    def _build_listings(self) -> None:
+        """Precompute catalog listings served by the read endpoints"""
+        self.language_codes = sorted(self.languages)
+        self.language_hint = (
+            f"Use one of: {', '.join(self.language_codes[:10])}"
+            f"{'...' if len(self.language_codes) > 10 else ''}"
+        )
+
+        self._languages_list = [
+            {
+                "code": lang.code,
+                "name": lang.name,
+                "native_name": lang.native_name,
+                "locales": list(lang.locales.keys()),
+                "default_locale": lang.default_locale,
+                "total_voices": lang.total_voices,
+            }
+            for lang in sorted(self.languages.values(), key=lambda x: x.name)
+        ]
+
+        self._voices_flat = []
+        self._full_catalog = {}
+        for lang_code, lang in self.languages.items():
+            lang_data = {
+                "name": lang.name,
+                "native_name": lang.native_name,
+                "default_locale": lang.default_locale,
+                "locales": {},
+            }
+            for locale_code, locale in lang.locales.items():
+                locale.voice_names_by_gender = {
+                    g.value: [v.name for v in voices]
+                    for g, voices in locale.voices_by_gender.items()
+                }
+                locale_data = {
+                    "name": locale.name,
+                    "voices": {},
+                }
+                for voice_name, voice in locale.voices.items():
+                    voice.quality_values = qualities = [q.value for q in voice.available_qualities]
+                    locale_data["voices"][voice_name] = {
+                        "display_name": voice.display_name,
+                        "gender": voice.gender.value,
+                        "qualities": qualities,
+                    }
+                    self._voices_flat.append(FlatVoiceEntry(
+                        language=lang_code,
+                        language_name=lang.name,
+                        locale=locale_code,
+                        locale_name=locale.name,
+                        voice=voice_name,
+                        display_name=voice.display_name,
+                        gender=voice.gender.value,
+                        qualities=qualities,
+                        key=f"{lang_code}_{locale_code}-{voice_name}",
+                    ))
+                lang_data["locales"][locale_code] = locale_data
+            self._full_catalog[lang_code] = lang_data
+
     @property
     def total_voices(self) -> int:
         """Get total number of unique voices"""
@@ -433,10 +541,7 @@ class VoiceCatalog:
         # Parse gender
         gender_enum = None
         if gender:
-            try:
-                gender_enum = Gender(gender.lower())
-            except ValueError:
-                pass
+            gender_enum = GENDER_BY_VALUE.get(gender.lower())
 
         # Get voice (or default for gender)
         if voice:
@@ -449,10 +554,7 @@ class VoiceCatalog:
         # Get quality variant
         quality_enum = None
         if quality:
-            try:
-                quality_enum = Quality(quality.lower())
-            except ValueError:
-                pass
+            quality_enum = QUALITY_BY_VALUE.get(quality.lower())
 
         variant = v.get_variant(quality_enum)
         if not variant:
@@ -473,17 +575,7 @@ class VoiceCatalog:
 
     def list_languages(self) -> List[Dict[str, Any]]:
         """Get list of all languages with summary info"""
-        result = []
-        for lang in sorted(self.languages.values(), key=lambda x: x.name):
-            result.append({
-                "code": lang.code,
-                "name": lang.name,
-                "native_name": lang.native_name,
-                "locales": list(lang.locales.keys()),
-                "default_locale": lang.default_locale,
-                "total_voices": lang.total_voices,
-            })
-        return result
+        return self._languages_list
 
     def list_locales(self, language: str) -> List[Dict[str, Any]]:
         """Get list of locales for a language"""
@@ -493,15 +585,14 @@ class VoiceCatalog:
 
         result = []
         for loc in lang.locales.values():
-            voices_by_gender = loc.voices_by_gender
             result.append({
                 "code": loc.code,
                 "name": loc.name,
                 "full_code": f"{language}-{loc.code}",
                 "voice_count": len(loc.voices),
                 "genders": {
-                    g.value: len(voices)
-                    for g, voices in voices_by_gender.items()
+                    g: len(names)
+                    for g, names in loc.voice_names_by_gender.items()
                 },
             })
         return result
@@ -519,10 +610,7 @@ class VoiceCatalog:
 
         gender_enum = None
         if gender:
-            try:
-                gender_enum = Gender(gender.lower())
-            except ValueError:
-                pass
+            gender_enum = GENDER_BY_VALUE.get(gender.lower())
 
         result = []
         for v in loc.get_voices(gender_enum):
@@ -531,35 +619,24 @@ class VoiceCatalog:
                 "display_name": v.display_name,
                 "gender": v.gender.value,
                 "description": v.description,
-                "qualities": [q.value for q in v.available_qualities],
-                "best_quality": v.best_quality.value if v.best_quality else None,
+                "qualities": v.quality_values,
+                "best_quality": v.quality_values[0] if v.quality_values else None,
             })
         return result
 
+    def list_all_voices(self) -> List[FlatVoiceEntry]:
+        """Get flat list of all voices across all languages"""
+        return self._voices_flat
+
     def get_full_catalog(self) -> Dict[str, Any]:
         """Get complete voice catalog"""
-        result = {}
-        for lang_code, lang in self.languages.items():
-            lang_data = {
-                "name": lang.name,
-                "native_name": lang.native_name,
-                "default_locale": lang.default_locale,
-                "locales": {},
-            }
-            for locale_code, locale in lang.locales.items():
-                locale_data = {
-                    "name": locale.name,
-                    "voices": {},
-                }
-                for voice_name, voice in locale.voices.items():
-                    locale_data["voices"][voice_name] = {
-                        "display_name": voice.display_name,
-                        "gender": voice.gender.value,
-                        "qualities": [q.value for q in voice.available_qualities],
-                    }
-                lang_data["locales"][locale_code] = locale_data
-            result[lang_code] = lang_data
-        return result
+        return self._full_catalog
+
+
+# Always allowed to connect (health checks from the host)
+LOCALHOST_ADDRESSES = ("127.0.0.1", "::1", "localhost")
+
+IPNetwork = Union[ipaddress.IPv4Network, ipaddress.IPv6Network]
 
 
 class Settings:
@@ -572,12 +649,18 @@ class Settings:
         self.port = int(os.getenv("PORT", "8000"))
         self.tailscale_ip = os.getenv("TAILSCALE_IP", "")
         
-        # Security - Allowed backend IP
+        # Security - Allowed backend IPs (comma-separated addresses or CIDR networks)
         self.backend_ip = os.getenv("BACKEND_IP", "")
+        self._allowed_ips, self._allowed_networks = self._parse_allowed_ips(self.backend_ip)
+        # Token the /piper/admin endpoints require in X-Admin-Token (empty = admin disabled)
+        self.admin_token = os.getenv("ADMIN_TOKEN", "")
         
         # Models Directory
         self.models_dir = Path(os.getenv("MODELS_DIR", "/app/models"))
         self.voice_index_path = self.models_dir / "voice_index.json"
+        # Seconds between checks of the voice index for changes. Each uvicorn worker
+        # reloads its own catalog when the file changes (0 = disabled, the default)
+        self.catalog_watch_interval = float(os.getenv("CATALOG_WATCH_INTERVAL", "0"))
 
         # TTS defaults
         self.default_language = os.getenv("DEFAULT_LANGUAGE", "en")
@@ -599,10 +682,63 @@ class Settings:
         # Performance Settings
         self.max_concurrent_requests = int(os.getenv("MAX_CONCURRENT_REQUESTS", "10"))
         self.request_timeout = int(os.getenv("REQUEST_TIMEOUT", "30"))
-        self.worker_threads = int(os.getenv("WORKER_THREADS", "4"))
-        
-        # Temporary Directory
-        self.temp_dir = Path(os.getenv("TEMP_DIR", "/tmp/piper"))
+        self.worker_threads = int(os.getenv("WORKER_THREADS", "4"))  # uvicorn worker processes
+        self.backlog = int(os.getenv("BACKLOG", "2048"))  # Pending connection queue size
+        # Seconds in-flight requests get to finish on shutdown
+        self.shutdown_timeout = int(os.getenv("SHUTDOWN_TIMEOUT", "30"))
+
+        # Voice models loaded at startup (comma-separated voice keys such as
+        # en_US-lessac-high); empty preloads the default voice only
+        self.preload_voices = [
+            key.strip() for key in os.getenv("PRELOAD_VOICES", "").split(",") if key.strip()
+        ]
+        # Read all model files into the page cache at startup (Linux only)
+        self.prefetch_models = os.getenv("PREFETCH_MODELS", "false").lower() == "true"
+        # JSON file of prompts synthesized into the audio cache at startup,
+        # e.g. {"en": ["Welcome", "Please hold"]} (empty = none)
+        self.warmup_prompts_file = os.getenv("WARMUP_PROMPTS_FILE", "")
+        # ONNX Runtime intra-op threads per voice session (0 = onnxruntime default).
+        # Inference runs on SYNTH_WORKERS threads at once, so keep the product
+        # of the two at or below the number of cores
+        self.onnx_threads = int(os.getenv("ONNX_THREADS", "1"))
+        # Load <voice>.int8.onnx instead of <voice>.onnx when quantize_models.py created it.
+        # Opt-in: INT8 weights trade some audio quality for speed and memory
+        self.int8_models = os.getenv("INT8_MODELS", "false").lower() == "true"
+        # Run inference on the GPU (requires onnxruntime-gpu instead of onnxruntime)
+        self.use_cuda = os.getenv("USE_CUDA", "false").lower() == "true"
+        self.cuda_device_id = int(os.getenv("CUDA_DEVICE_ID", "0"))
+
+        # Synthesis concurrency: segments synthesized at once, and requests allowed
+        # beyond that limit before new requests are rejected with 503
+        self.max_concurrent_synth = int(os.getenv("MAX_CONCURRENT_SYNTH", "4"))
+        self.max_synth_queue = int(os.getenv("MAX_SYNTH_QUEUE", "32"))
+        # Seconds a synthesized segment waits for the client to read it before the
+        # stream is abandoned and its synthesis slot released
+        self.stream_stall_timeout = float(os.getenv("STREAM_STALL_TIMEOUT", "30"))
+        # Threads running ONNX inference (defaults to MAX_CONCURRENT_SYNTH)
+        self.synth_workers = int(os.getenv("SYNTH_WORKERS", str(self.max_concurrent_synth)))
+        # Threads dedicated to each loaded voice instead of the shared SYNTH_WORKERS
+        # pool (0 = shared pool)
+        self.voice_workers = int(os.getenv("VOICE_WORKERS", "0"))
+        # Worker processes running inference instead of threads (0 = use threads).
+        # Each process loads its own copy of every voice it uses
+        self.synth_processes = int(os.getenv("SYNTH_PROCESSES", "0"))
+        # Pin each synthesis process to its own ONNX_THREADS CPUs (Linux only)
+        self.pin_synth_processes = os.getenv("PIN_SYNTH_PROCESSES", "false").lower() == "true"
+
+        # Synthesized audio cache (number of entries, 0 = disabled)
+        self.audio_cache_size = int(os.getenv("AUDIO_CACHE_SIZE", "512"))
+        # Upper bound on the memory held by cached audio, in megabytes
+        self.audio_cache_mb = int(os.getenv("AUDIO_CACHE_MB", "100"))
+        # Second-level audio cache on disk (empty = disabled), bounded in megabytes
+        self.audio_disk_cache_dir = os.getenv("AUDIO_DISK_CACHE_DIR", "")
+        self.audio_disk_cache_mb = int(os.getenv("AUDIO_DISK_CACHE_MB", "1024"))
+        # Seconds a request waits for an identical in-flight request's audio before
+        # synthesizing it itself
+        self.inflight_wait_timeout = float(os.getenv("INFLIGHT_WAIT_TIMEOUT", "5"))
+
+        # Phonemized text cache (number of entries, 0 = disabled)
+        self.phoneme_cache_size = int(os.getenv("PHONEME_CACHE_SIZE", "10000"))
         
         # Rate Limiting
         self.rate_limit_enabled = os.getenv("RATE_LIMIT_ENABLED", "false").lower() == "true"
@@ -622,10 +758,6 @@ class Settings:
         # Voice catalog
         self.catalog = VoiceCatalog()
         
-    def ensure_temp_dir(self) -> None:
-        """Create temp directory if it doesn't exist"""
-        self.temp_dir.mkdir(parents=True, exist_ok=True)
-
     def load_voices(self) -> bool:
         """Load voice catalog from index file"""
         if not self.voice_index_path.exists():
@@ -636,18 +768,47 @@ class Settings:
             return False
         return self.catalog.load_from_index(str(self.voice_index_path))
     
+    @staticmethod
+    def _parse_allowed_ips(value: str) -> Tuple[FrozenSet[str], List[IPNetwork]]:
+        """
+        Parse BACKEND_IP into a set of exact addresses and a list of networks.
+        Single addresses are matched by string lookup; networks need parsing the client IP.
+        """
+        addresses = set(LOCALHOST_ADDRESSES)
+        networks: List[IPNetwork] = []
+        for entry in (e.strip() for e in value.split(",")):
+            if not entry:
+                continue
+            try:
+                network = ipaddress.ip_network(entry, strict=False)
+            except ValueError:
+                logger.warning("Ignoring invalid BACKEND_IP entry", extra={"entry": entry})
+                continue
+            if network.num_addresses == 1:
+                addresses.add(str(network.network_address))
+            else:
+                networks.append(network)
+        return frozenset(addresses), networks
+
     def is_allowed_ip(self, client_ip: str) -> bool:
         """Check if client IP is allowed to connect"""
         # If no backend IP configured, allow all (for development)
         if not self.backend_ip:
             return True
-        
-        # Allow localhost for health checks
-        if client_ip in ("127.0.0.1", "::1", "localhost"):
+
+        # Configured backend addresses and localhost (for health checks)
+        if client_ip in self._allowed_ips:
             return True
-            
-        # Allow configured backend IP
-        return client_ip == self.backend_ip
+
+        if not self._allowed_networks:
+            return False
+
+        # Configured backend networks
+        try:
+            address = ipaddress.ip_address(client_ip)
+        except ValueError:
+            return False
+        return any(address in network for network in self._allowed_networks)
 
 
 # Global settings instance
@@ -225,9 +225,9 @@ async def cleanup_old_logs(
 
         if deleted > 0:
             logger = get_logger("log_config")
-            logger.info(f"Cleaned {deleted} log files older than {days} days")
+            logger.info("Cleaned %d log files older than %d days", deleted, days)
     except Exception as e:
         logger = get_logger("log_config")
-        logger.error(f"Log cleanup failed: {e}")
+        logger.error("Log cleanup failed: %s", e)
 
     return deleted
@@ -3,14 +3,22 @@
 # FastAPI application with hierarchical TTS API, IP filtering, and Prometheus metrics
 # Version 2.2.0: Integrated centralized structured logging (JSON → Fluent Bit → Loki)
 
+import asyncio
+import gzip
+import logging
 import time
-from typing import Optional
+import hashlib
+import hmac
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Any, Literal, Optional, Tuple
 from contextlib import asynccontextmanager
 
-from fastapi import FastAPI, HTTPException, Query, Request
-from fastapi.responses import StreamingResponse, JSONResponse
+import orjson
+from fastapi import FastAPI, HTTPException, Query, Request, Response
+from fastapi.responses import StreamingResponse, ORJSONResponse
 from starlette.middleware.base import BaseHTTPMiddleware
-from pydantic import BaseModel, Field
+from pydantic import BaseModel, ConfigDict, Field
 
 # Initialize structured logging BEFORE any other app imports
 from log_config import setup_logging, get_logger
@@ -35,7 +43,7 @@ from tts_service import (
     VoiceNotFoundError,
     QualityNotFoundError,
     TextValidationError,
-    SynthesisError,
+    ServiceOverloadedError,
 )
 
 # Prometheus metrics
@@ -48,8 +56,7 @@ from metrics import (
     track_tts_error,
     track_blocked_request,
     set_catalog_stats,
-    increment_active_generations,
-    decrement_active_generations,
+    warm_language_metrics,
 )
 
 
@@ -75,7 +82,7 @@ class IPFilterMiddleware(BaseHTTPMiddleware):
     async def dispatch(self, request: Request, call_next):
         # Check if endpoint is in allowed list (bypass IP filtering)
         path = request.url.path
-        if path in ALLOWED_ENDPOINTS:
+        if path in ALLOWED_ENDPOINTS or not settings.backend_ip:
             return await call_next(request)
         
         # Get client IP from request
@@ -92,7 +99,7 @@ class IPFilterMiddleware(BaseHTTPMiddleware):
                 },
             )
             track_blocked_request()
-            return JSONResponse(
+            return ORJSONResponse(
                 status_code=403,
                 content={
                     "error": "Access denied",
@@ -113,8 +120,9 @@ class IPFilterMiddleware(BaseHTTPMiddleware):
         # Check X-Forwarded-For header (may contain multiple IPs)
         forwarded_for = request.headers.get("X-Forwarded-For")
         if forwarded_for:
-            # Take the first IP (original client)
-            return forwarded_for.split(",")[0].strip()
+            # Take the first IP (original client) without splitting the whole list
+            comma = forwarded_for.find(",")
+            return (forwarded_for[:comma] if comma >= 0 else forwarded_for).strip()
         
         # Check X-Real-IP header
         real_ip = request.headers.get("X-Real-IP")
@@ -128,6 +136,202 @@ class IPFilterMiddleware(BaseHTTPMiddleware):
         return "unknown"
 
 
+# =============================================================================
+# Precomputed Catalog Responses
+# =============================================================================
+
+def _json_bytes(content: Any) -> bytes:
+    """Serialize content exactly as ORJSONResponse would"""
+    return orjson.dumps(content, option=orjson.OPT_NON_STR_KEYS | orjson.OPT_SERIALIZE_NUMPY)
+
+
+# Catalog data only changes when the catalog is (re)loaded; clients and proxies
+# may store it but must revalidate with the ETag, so a reload shows up at once
+CATALOG_CACHE_CONTROL = "public, no-cache"
+
+
+def _make_etag(body: bytes) -> str:
+    """Weak ETag (valid for both the plain and gzip representations)"""
+    return f'W/"{hashlib.blake2b(body, digest_size=8).hexdigest()}"'
+
+
+def _etag_matches(request: Request, etag: str) -> bool:
+    """Check whether If-None-Match contains the ETag"""
+    if_none_match = request.headers.get("if-none-match")
+    if not if_none_match:
+        return False
+    if if_none_match.strip() == "*":
+        return True
+    return any(
+        tag.strip() in (etag, etag[2:])
+        for tag in if_none_match.split(",")
+    )
+
+
+def _accepts_gzip(request: Request) -> bool:
+    """
+    Check whether Accept-Encoding allows gzip, honouring q-values:
+    "gzip;q=0" refuses it, and "*" covers it unless gzip is listed itself.
+    """
+    wildcard = False
+    for coding in request.headers.get("accept-encoding", "").split(","):
+        name, _, params = coding.partition(";")
+        name = name.strip().lower()
+        if name not in ("gzip", "x-gzip", "*"):
+            continue
+        q = 1.0
+        for param in params.split(";"):
+            key, _, value = param.partition("=")
+            if key.strip().lower() == "q":
+                try:
+                    q = float(value)
+                except ValueError:
+                    q = 0.0
+        if name == "*":
+            wildcard = q > 0
+        else:
+            return q > 0
+    return wildcard
+
+
+def _not_modified(etag: str) -> Response:
+    return Response(
+        status_code=304,
+        headers={"ETag": etag, "Cache-Control": CATALOG_CACHE_CONTROL},
+    )
+
+
+def _catalog_json(request: Request, content: Any) -> Response:
+    """
+    Return catalog-derived content with validators for the current catalog,
+    or 304 if the client's copy is current.
+
+    Returning the response directly skips FastAPI's jsonable_encoder pass.
+    """
+    etag = app.state.catalog_etag
+    if _etag_matches(request, etag):
+        return _not_modified(etag)
+    return ORJSONResponse(
+        content,
+        headers={"ETag": etag, "Cache-Control": CATALOG_CACHE_CONTROL},
+    )
+
+
+@dataclass
+class PrecomputedJSON:
+    """Serialized JSON response body with its gzip-compressed form and ETag"""
+    body: bytes
+    gzipped: bytes
+    etag: str
+
+    @classmethod
+    def build(cls, content: Any) -> "PrecomputedJSON":
+        body = _json_bytes(content)
+        return cls(
+            body=body,
+            gzipped=gzip.compress(body, compresslevel=9, mtime=0),
+            etag=_make_etag(body),
+        )
+
+    def response(self, request: Request) -> Response:
+        """Response for the request, compressed if the client accepts gzip"""
+        if _etag_matches(request, self.etag):
+            return _not_modified(self.etag)
+
+        headers = {
+            "ETag": self.etag,
+            "Cache-Control": CATALOG_CACHE_CONTROL,
+            "Vary": "Accept-Encoding",
+        }
+        if _accepts_gzip(request):
+            headers["Content-Encoding"] = "gzip"
+            return Response(self.gzipped, media_type="application/json", headers=headers)
+        return Response(self.body, media_type="application/json", headers=headers)
+
+
+def build_catalog_responses() -> None:
+    """
+    Pre-serialize and compress the catalog-wide listing responses and reset
+    memoized catalog queries. Must be called after every catalog (re)load.
+    """
+    tts_service.clear_caches()
+    languages = tts_service.get_languages()
+    voices = tts_service.get_all_voices()
+    app.state.languages_json = PrecomputedJSON.build({
+        "count": len(languages),
+        "languages": languages,
+    })
+    app.state.voices_json = PrecomputedJSON.build({
+        "count": len(voices),
+        "voices": voices,
+    })
+    app.state.catalog_json = PrecomputedJSON.build({
+        "stats": tts_service.get_stats(),
+        "catalog": tts_service.get_full_catalog(),
+    })
+    # Validator for the per-language endpoints, derived from the voice index
+    app.state.catalog_etag = f'W/"{settings.catalog.version}"'
+
+    # Health probe body only depends on the catalog size
+    app.state.health_body = _json_bytes({
+        "status": "healthy",
+        "service": "piper-tts",
+        "version": "2.2.0",
+        "languages": len(settings.catalog.languages),
+        "voices": settings.catalog.total_voices,
+    })
+
+
+def load_catalog() -> bool:
+    """Load the voice catalog from the index and rebuild the catalog responses"""
+    loaded = settings.load_voices()
+    if not loaded:
+        logger.error("Failed to load voice catalog")
+    else:
+        # Update catalog metrics (VoiceCatalog logs the load itself)
+        set_catalog_stats(len(settings.catalog.languages), settings.catalog.total_voices)
+        warm_language_metrics(settings.catalog.languages)
+
+    build_catalog_responses()
+    return loaded
+
+
+def _voice_index_stamp() -> Optional[Tuple[int, int]]:
+    """Modification time and size of the voice index, None if it is missing"""
+    try:
+        stat = settings.voice_index_path.stat()
+    except OSError:
+        return None
+    return stat.st_mtime_ns, stat.st_size
+
+
+async def watch_catalog(interval: float, loaded: Optional[Tuple[int, int]]) -> None:
+    """
+    Reload the catalog whenever the voice index changes. Every uvicorn worker
+    runs its own watcher, so all of them pick up a new index (e.g. after
+    setup.sh added voices), not only the one serving an admin reload.
+
+    A change is only loaded once the index has kept the same modification
+    time and size for two polls in a row, so a file that is still being
+    rewritten is never loaded half-built. loaded is the stamp of the index
+    the current catalog was built from.
+    """
+    previous = loaded
+    while True:
+        await asyncio.sleep(interval)
+        current = _voice_index_stamp()
+        if current is not None and current != loaded and current == previous:
+            loaded = current
+            logger.info(
+                "Voice index changed, reloading catalog",
+                extra={"path": str(settings.voice_index_path)},
+            )
+            # A failed load keeps the current catalog; the next change of the
+            # file triggers another attempt
+            load_catalog()
+        previous = current
+
+
 # =============================================================================
 # Lifespan Management
 # =============================================================================
@@ -146,33 +350,39 @@ async def lifespan(app: FastAPI):
         },
     )
 
-    # Ensure temp directory exists
-    settings.ensure_temp_dir()
-    logger.info(
-        "Temp directory ready",
-        extra={"temp_dir": str(settings.temp_dir)},
-    )
+    # Taken before loading, so a change made during startup is still picked up
+    index_stamp = _voice_index_stamp()
+    load_catalog()
 
-    # Load voice catalog
-    if not settings.load_voices():
-        logger.error("Failed to load voice catalog")
-    else:
-        languages_count = len(settings.catalog.languages)
-        voices_count = settings.catalog.total_voices
-        logger.info(
-            "Voice catalog loaded",
-            extra={
-                "languages_count": languages_count,
-                "voices_count": voices_count,
-            },
+    if tts_service.disk_cache is not None:
+        await asyncio.to_thread(tts_service.disk_cache.load)
+
+    # Load voice models before accepting traffic
+    preload = settings.preload_voices or [
+        key for key in [tts_service.get_default_voice_key()] if key
+    ]
+    if preload:
+        await tts_service.preload_voices(preload)
+
+    if settings.prefetch_models:
+        prefetched = await asyncio.to_thread(tts_service.prefetch_models)
+        logger.info("Model files prefetched", extra={"files": prefetched})
+
+    if settings.warmup_prompts_file:
+        await tts_service.warm_prompts(Path(settings.warmup_prompts_file))
+
+    watcher = None
+    if settings.catalog_watch_interval > 0:
+        watcher = asyncio.create_task(
+            watch_catalog(settings.catalog_watch_interval, index_stamp)
         )
-        
-        # Update catalog metrics
-        set_catalog_stats(languages_count, voices_count)
 
     yield
 
     logger.info("Shutting down Piper TTS Server")
+    if watcher is not None:
+        watcher.cancel()
+    tts_service.shutdown()
 
 
 # =============================================================================
@@ -184,6 +394,7 @@ app = FastAPI(
     description="Multi-language Text-to-Speech with hierarchical voice selection",
     version="2.2.0",
     lifespan=lifespan,
+    default_response_class=ORJSONResponse,
 )
 
 # Setup Prometheus metrics - MUST BE BEFORE IP filtering middleware
@@ -207,9 +418,11 @@ class TTSRequest(BaseModel):
     quality: Optional[str] = Field(None, description="Quality level: 'high', 'medium', 'low', 'x_low'")
     speed: float = Field(1.0, ge=0.5, le=2.0, description="Speech rate (0.5-2.0)")
     speaker_id: int = Field(0, ge=0, description="Speaker ID for multi-speaker models")
+    format: Literal["mp3", "pcm"] = Field("mp3", description="Audio format: 'mp3' or 'pcm' (raw 16-bit little-endian mono)")
 
-    class Config:
-        json_schema_extra = {
+    model_config = ConfigDict(
+        extra="ignore",
+        json_schema_extra={
             "examples": [
                 {
                     "text": "Hello, how are you today?",
@@ -230,7 +443,8 @@ class TTSRequest(BaseModel):
                     "voice": "gyro",
                 },
             ]
-        }
+        },
+    )
 
 
 class ErrorResponse(BaseModel):
@@ -245,52 +459,15 @@ class ErrorResponse(BaseModel):
 # Exception Handlers
 # =============================================================================
 
-@app.exception_handler(LanguageNotFoundError)
-async def language_not_found_handler(request, exc: LanguageNotFoundError):
-    track_tts_error("language_not_found")
-    return JSONResponse(status_code=404, content=exc.to_dict())
-
-
-@app.exception_handler(LocaleNotFoundError)
-async def locale_not_found_handler(request, exc: LocaleNotFoundError):
-    track_tts_error("locale_not_found")
-    return JSONResponse(status_code=404, content=exc.to_dict())
-
-
-@app.exception_handler(GenderNotFoundError)
-async def gender_not_found_handler(request, exc: GenderNotFoundError):
-    track_tts_error("gender_not_found")
-    return JSONResponse(status_code=400, content=exc.to_dict())
-
-
-@app.exception_handler(VoiceNotFoundError)
-async def voice_not_found_handler(request, exc: VoiceNotFoundError):
-    track_tts_error("voice_not_found")
-    return JSONResponse(status_code=404, content=exc.to_dict())
-
-
-@app.exception_handler(QualityNotFoundError)
-async def quality_not_found_handler(request, exc: QualityNotFoundError):
-    track_tts_error("quality_not_found")
-    return JSONResponse(status_code=400, content=exc.to_dict())
-
-
-@app.exception_handler(TextValidationError)
-async def text_validation_handler(request, exc: TextValidationError):
-    track_tts_error("text_validation")
-    return JSONResponse(status_code=400, content=exc.to_dict())
-
-
-@app.exception_handler(SynthesisError)
-async def synthesis_error_handler(request, exc: SynthesisError):
-    track_tts_error("synthesis_error")
-    return JSONResponse(status_code=500, content=exc.to_dict())
-
-
 @app.exception_handler(TTSError)
 async def tts_error_handler(request, exc: TTSError):
-    track_tts_error("tts_error")
-    return JSONResponse(status_code=500, content=exc.to_dict())
+    """Handle all TTS errors; status and metric label come from the error class"""
+    track_tts_error(exc.error_type)
+    return ORJSONResponse(
+        status_code=exc.status_code,
+        content=exc.to_dict(),
+        headers=exc.headers,
+    )
 
 
 # =============================================================================
@@ -300,19 +477,13 @@ async def tts_error_handler(request, exc: TTSError):
 @app.get("/piper/health")
 async def health_check(request: Request):
     """Health check endpoint - always allowed regardless of IP"""
-    return {
-        "status": "healthy",
-        "service": "piper-tts",
-        "version": "2.2.0",
-        "languages": len(settings.catalog.languages),
-        "voices": settings.catalog.total_voices,
-    }
+    return Response(app.state.health_body, media_type="application/json")
 
 
 @app.get("/piper/info")
 async def server_info():
     """Server information"""
-    return {
+    return ORJSONResponse({
         "service": "Piper TTS",
         "version": "2.2.0",
         "api_version": "v2",
@@ -334,7 +505,7 @@ async def server_info():
             "bitrate": settings.mp3_bitrate,
             "sample_rate": settings.default_sample_rate,
         },
-    }
+    })
 
 
 # =============================================================================
@@ -342,21 +513,17 @@ async def server_info():
 # =============================================================================
 
 @app.get("/piper/tts/languages")
-async def list_languages():
+async def list_languages(request: Request):
     """
     List all supported languages.
     
     Returns languages with their available locales and voice counts.
     """
-    languages = tts_service.get_languages()
-    return {
-        "count": len(languages),
-        "languages": languages,
-    }
+    return app.state.languages_json.response(request)
 
 
 @app.get("/piper/tts/languages/{language}")
-async def get_language_details(language: str):
+async def get_language_details(language: str, request: Request):
     """
     Get details for a specific language.
     
@@ -369,14 +536,14 @@ async def get_language_details(language: str):
             context=None,
         )
 
-    return {
+    return _catalog_json(request, {
         "code": lang.code,
         "name": lang.name,
         "native_name": lang.native_name,
         "default_locale": lang.default_locale,
         "locales": tts_service.get_locales(language),
         "total_voices": lang.total_voices,
-    }
+    })
 
 
 # =============================================================================
@@ -384,22 +551,22 @@ async def get_language_details(language: str):
 # =============================================================================
 
 @app.get("/piper/tts/languages/{language}/locales")
-async def list_locales(language: str):
+async def list_locales(language: str, request: Request):
     """
     List available locales for a language.
     
     Returns locales with voice counts by gender.
     """
     locales = tts_service.get_locales(language)
-    return {
+    return _catalog_json(request, {
         "language": language,
         "count": len(locales),
         "locales": locales,
-    }
+    })
 
 
 @app.get("/piper/tts/languages/{language}/locales/{locale}")
-async def get_locale_details(language: str, locale: str):
+async def get_locale_details(language: str, locale: str, request: Request):
     """
     Get details for a specific locale.
     
@@ -413,17 +580,13 @@ async def get_locale_details(language: str, locale: str):
             raise LanguageNotFoundError(f"Language '{language}' not found")
         raise LocaleNotFoundError(f"Locale '{locale}' not found for '{language}'")
 
-    voices_by_gender = loc.voices_by_gender
-    return {
+    return _catalog_json(request, {
         "code": loc.code,
         "name": loc.name,
         "full_code": f"{language}-{locale}",
         "voices": tts_service.get_voices(language, locale),
-        "by_gender": {
-            g.value: [v.name for v in voices]
-            for g, voices in voices_by_gender.items()
-        },
-    }
+        "by_gender": loc.voice_names_by_gender,
+    })
 
 
 # =============================================================================
@@ -434,6 +597,7 @@ async def get_locale_details(language: str, locale: str):
 async def list_voices(
     language: str,
     locale: str,
+    request: Request,
     gender: Optional[str] = Query(None, description="Filter by gender"),
 ):
     """
@@ -442,28 +606,33 @@ async def list_voices(
     Optionally filter by gender (male/female/neutral).
     """
     voices = tts_service.get_voices(language, locale, gender)
-    return {
+    return _catalog_json(request, {
         "language": language,
         "locale": locale,
         "gender_filter": gender,
         "count": len(voices),
         "voices": voices,
-    }
+    })
 
 
 @app.get("/piper/tts/languages/{language}/locales/{locale}/voices/{voice}")
-async def get_voice_details(language: str, locale: str, voice: str):
+async def get_voice_details(
+    language: str,
+    locale: str,
+    voice: str,
+    request: Request,
+):
     """
     Get detailed information about a specific voice.
     
     Returns voice properties and available quality variants.
     """
     details = tts_service.get_voice_details(language, locale, voice)
-    return {
+    return _catalog_json(request, {
         "language": language,
         "locale": locale,
         **details,
-    }
+    })
 
 
 # =============================================================================
@@ -471,47 +640,56 @@ async def get_voice_details(language: str, locale: str, voice: str):
 # =============================================================================
 
 @app.get("/piper/tts/catalog")
-async def get_full_catalog():
+async def get_full_catalog(request: Request):
     """
     Get complete voice catalog.
     
     Returns all languages, locales, and voices in hierarchical structure.
     """
-    catalog = tts_service.get_full_catalog()
-    stats = tts_service.get_stats()
-    return {
-        "stats": stats,
-        "catalog": catalog,
-    }
+    return app.state.catalog_json.response(request)
 
 
 @app.get("/piper/tts/voices")
-async def list_all_voices():
+async def list_all_voices(request: Request):
     """
     List all voices across all languages (flat list).
     
     Useful for searching or building UI.
     """
-    all_voices = []
-    for lang_code, lang in settings.catalog.languages.items():
-        for locale_code, locale in lang.locales.items():
-            for voice_name, voice in locale.voices.items():
-                all_voices.append({
-                    "language": lang_code,
-                    "language_name": lang.name,
-                    "locale": locale_code,
-                    "locale_name": locale.name,
-                    "voice": voice_name,
-                    "display_name": voice.display_name,
-                    "gender": voice.gender.value,
-                    "qualities": [q.value for q in voice.available_qualities],
-                    "key": f"{lang_code}_{locale_code}-{voice_name}",
-                })
-
-    return {
-        "count": len(all_voices),
-        "voices": all_voices,
-    }
+    return app.state.voices_json.response(request)
+
+
+# =============================================================================
+# Admin Endpoints
+# =============================================================================
+
+def _require_admin(request: Request) -> None:
+    """Reject admin requests without the configured ADMIN_TOKEN"""
+    if not settings.admin_token:
+        raise HTTPException(status_code=403, detail="Admin endpoints are disabled (ADMIN_TOKEN is not set)")
+    token = request.headers.get("x-admin-token", "")
+    if not hmac.compare_digest(token.encode(), settings.admin_token.encode()):
+        raise HTTPException(status_code=401, detail="Invalid admin token")
+
+
+@app.post("/piper/admin/catalog/reload")
+async def reload_catalog(request: Request):
+    """
+    Reload the voice catalog from the voice index (e.g. after setup.sh added voices).
+    Requires the X-Admin-Token header.
+
+    Rebuilds the pre-serialized catalog responses and their ETags. Only the
+    uvicorn worker handling this request reloads immediately; the other
+    workers pick up a changed index within CATALOG_WATCH_INTERVAL.
+    """
+    _require_admin(request)
+    if not load_catalog():
+        raise HTTPException(status_code=500, detail="Failed to reload voice catalog")
+    return ORJSONResponse({
+        "status": "reloaded",
+        "version": settings.catalog.version,
+        "stats": tts_service.get_stats(),
+    })
 
 
 # =============================================================================
@@ -561,18 +739,18 @@ async def generate_speech(request: TTSRequest):
     }
     ```
     
-    Returns MP3 audio stream.
+    Returns an MP3 audio stream, or raw 16-bit little-endian mono PCM with
+    `"format": "pcm"` (sample rate in `X-Sample-Rate`). Longer texts are synthesized sentence by
+    sentence, so audio starts streaming as soon as the first sentence is ready;
+    `X-Generation-Time` reports the time to first audio.
     """
-    start_time = time.time()
+    start_time = time.perf_counter()
     
     # Track text length
     track_text_length(request.language, len(request.text))
     
-    # Increment active generations
-    increment_active_generations()
-    
     try:
-        audio_data = await tts_service.generate_speech(
+        audio_stream = await tts_service.generate_speech(
             text=request.text,
             language=request.language,
             locale=request.locale,
@@ -581,24 +759,29 @@ async def generate_speech(request: TTSRequest):
             quality=request.quality,
             speed=request.speed,
             speaker_id=request.speaker_id,
+            audio_format=request.format,
         )
 
-        duration = time.time() - start_time
-        duration_ms = duration * 1000
+        duration = time.perf_counter() - start_time
 
-        logger.info(
-            "Speech generated successfully",
-            extra={
-                "language": request.language,
-                "locale": request.locale or "default",
-                "voice": request.voice or "default",
-                "gender": request.gender or "any",
-                "quality": request.quality or "default",
-                "speed": request.speed,
-                "text_length": len(request.text),
-                "duration_ms": round(duration_ms, 2),
-            },
-        )
+        # The one log record per request; skip building it when INFO is disabled
+        if logger.isEnabledFor(logging.INFO):
+            logger.info(
+                "Speech generated successfully",
+                extra={
+                    "language": request.language,
+                    "locale": request.locale or "default",
+                    "voice": request.voice or "default",
+                    "gender": request.gender or "any",
+                    "quality": request.quality or "default",
+                    "voice_key": audio_stream.voice_key,
+                    "speed": request.speed,
+                    "text_length": len(request.text),
+                    "segments": audio_stream.segments,
+                    "cached": audio_stream.audio is not None,
+                    "duration_ms": round(duration * 1000, 2),
+                },
+            )
         
         # Track successful request
         track_tts_request(
@@ -611,24 +794,49 @@ async def generate_speech(request: TTSRequest):
         # Track voice usage
         track_voice_usage(
             language=request.language,
-            locale=request.locale or "default",
             voice=request.voice or "default",
-            gender=request.gender or "any",
-            quality=request.quality or "default"
         )
 
+        headers = {
+            "Content-Disposition": f"inline; filename=speech.{audio_stream.audio_format}",
+            "X-Generation-Time": f"{duration:.3f}",
+        }
+        if audio_stream.audio_format == "pcm":
+            media_type = "application/octet-stream"
+            headers["X-Audio-Format"] = "s16le"
+            headers["X-Sample-Rate"] = str(audio_stream.sample_rate)
+        else:
+            media_type = "audio/mpeg"
+
+        # Cached audio is complete - send it in one response
+        if audio_stream.audio is not None:
+            headers["X-Cache"] = "HIT"
+            track_audio_size(request.language, len(audio_stream.audio))
+            return Response(
+                content=audio_stream.audio,
+                media_type=media_type,
+                headers=headers,
+            )
+
+        async def stream_audio():
+            size = 0
+            try:
+                async for chunk in audio_stream:
+                    size += len(chunk)
+                    yield chunk
+            finally:
+                # Observed once per response, including partially sent ones
+                track_audio_size(request.language, size)
+
         return StreamingResponse(
-            audio_data,
-            media_type="audio/mpeg",
-            headers={
-                "Content-Disposition": "inline; filename=speech.mp3",
-                "X-Generation-Time": f"{duration:.3f}",
-            },
+            stream_audio(),
+            media_type=media_type,
+            headers=headers,
         )
     
     except (LanguageNotFoundError, LocaleNotFoundError, VoiceNotFoundError,
             GenderNotFoundError, QualityNotFoundError, TextValidationError) as e:
-        duration = time.time() - start_time
+        duration = time.perf_counter() - start_time
         logger.warning(
             "TTS client error",
             extra={
@@ -647,9 +855,26 @@ async def generate_speech(request: TTSRequest):
             duration=duration
         )
         raise
+
+    except ServiceOverloadedError:
+        duration = time.perf_counter() - start_time
+        logger.warning(
+            "TTS request shed",
+            extra={
+                "language": request.language,
+                "text_length": len(request.text),
+            },
+        )
+        track_tts_request(
+            language=request.language,
+            locale=request.locale,
+            status="overloaded",
+            duration=duration
+        )
+        raise
     
     except Exception as e:
-        duration = time.time() - start_time
+        duration = time.perf_counter() - start_time
         logger.error(
             "TTS unexpected error",
             extra={
@@ -669,10 +894,6 @@ async def generate_speech(request: TTSRequest):
         )
         track_tts_error("unexpected_error")
         raise
-    
-    finally:
-        # Decrement active generations
-        decrement_active_generations()
 
 
 # =============================================================================
@@ -694,6 +915,7 @@ async def legacy_synthesize(request: TTSRequest):
 # =============================================================================
 
 if __name__ == "__main__":
+    import sys
     import uvicorn
     uvicorn.run(
         "main:app",
@@ -702,4 +924,10 @@ if __name__ == "__main__":
         reload=False,
         log_level=settings.log_level.lower(),
         workers=settings.worker_threads,
+        # uvloop is not available on Windows
+        loop="auto" if sys.platform == "win32" else "uvloop",
+        http="httptools",
+        backlog=settings.backlog,
+        # Stop accepting connections, let in-flight speech finish, then cancel
+        timeout_graceful_shutdown=settings.shutdown_timeout,
     )
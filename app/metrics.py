@@ -3,9 +3,12 @@
 # Prometheus metrics module for Lingudesk Piper TTS Server
 
 import time
-from typing import Callable
+from collections import Counter as Tally
+from functools import lru_cache
+from typing import Callable, Iterable, Iterator
 
-from fastapi import FastAPI, Request, Response
+from fastapi import FastAPI, Request
+from fastapi.responses import StreamingResponse
 from prometheus_client import (
     Counter,
     Histogram,
@@ -74,7 +77,7 @@ TTS_REQUESTS_TOTAL = Counter(
 TTS_GENERATION_DURATION_SECONDS = Histogram(
     "tts_generation_duration_seconds",
     "TTS generation duration in seconds",
-    ["language", "locale", "server"],
+    ["language", "server"],
     buckets=(0.1, 0.25, 0.5, 1.0, 2.0, 5.0, 10.0, 30.0, 60.0),
 )
 
@@ -88,7 +91,7 @@ TTS_TEXT_LENGTH = Histogram(
 TTS_AUDIO_SIZE_BYTES = Histogram(
     "tts_audio_size_bytes",
     "Size of generated audio in bytes",
-    ["language", "locale", "server"],
+    ["language", "server"],
     buckets=(1000, 10000, 50000, 100000, 500000, 1000000, 5000000),
 )
 
@@ -96,13 +99,32 @@ TTS_AUDIO_SIZE_BYTES = Histogram(
 TTS_VOICE_USAGE_TOTAL = Counter(
     "tts_voice_usage_total",
     "Voice usage count",
-    ["language", "locale", "voice", "gender", "quality", "server"],
+    ["language", "voice", "server"],
 )
 
-# Active generations
+# Active generations (read from the synthesis limiter at scrape time)
 TTS_ACTIVE_GENERATIONS = Gauge(
     "tts_active_generations",
-    "Number of TTS generations currently in progress",
+    "Number of TTS generations currently synthesizing",
+    ["server"],
+)
+
+# Synthesis concurrency and load shedding
+TTS_SYNTHESIS_IN_FLIGHT = Gauge(
+    "tts_synthesis_in_flight",
+    "Number of segments currently being synthesized",
+    ["server"],
+)
+
+TTS_SYNTHESIS_QUEUE_DEPTH = Gauge(
+    "tts_synthesis_queue_depth",
+    "Number of segments waiting for a synthesis slot",
+    ["server"],
+)
+
+TTS_SHED_REQUESTS_TOTAL = Counter(
+    "tts_shed_requests_total",
+    "Total requests rejected because the synthesis queue was full",
     ["server"],
 )
 
@@ -138,27 +160,27 @@ TTS_BLOCKED_REQUESTS_TOTAL = Counter(
 # ============================================
 
 def increment_counter(metric: Counter, labels: dict, value: float = 1):
-    """Increment a counter metric safely."""
-    try:
-        metric.labels(**labels).inc(value)
-    except Exception as e:
-        logger.debug(f"Failed to increment counter: {e}")
+    """Increment a counter metric."""
+    metric.labels(**labels).inc(value)
 
 
 def observe_histogram(metric: Histogram, labels: dict, value: float):
-    """Observe a histogram metric safely."""
-    try:
-        metric.labels(**labels).observe(value)
-    except Exception as e:
-        logger.debug(f"Failed to observe histogram: {e}")
+    """Observe a histogram metric."""
+    metric.labels(**labels).observe(value)
 
 
 def set_gauge(metric: Gauge, labels: dict, value: float):
-    """Set a gauge metric safely."""
-    try:
-        metric.labels(**labels).set(value)
-    except Exception as e:
-        logger.debug(f"Failed to set gauge: {e}")
+    """Set a gauge metric."""
+    metric.labels(**labels).set(value)
+
+
+@lru_cache(maxsize=4096)
+def _child(metric, *label_values: str):
+    """
+    Get a metric's child for label values (in label declaration order).
+    Cached so hot paths skip the label validation and lookup in labels().
+    """
+    return metric.labels(*label_values)
 
 
 # ============================================
@@ -167,64 +189,53 @@ def set_gauge(metric: Gauge, labels: dict, value: float):
 
 def track_tts_request(language: str, locale: str, status: str, duration: float = None):
     """Track a TTS generation request."""
-    increment_counter(TTS_REQUESTS_TOTAL, {
-        "language": language,
-        "locale": locale or "default",
-        "status": status,
-        "server": SERVER_NAME,
-    })
+    _child(TTS_REQUESTS_TOTAL, language, locale or "default", status, SERVER_NAME).inc()
     if duration is not None:
-        observe_histogram(TTS_GENERATION_DURATION_SECONDS, {
-            "language": language,
-            "locale": locale or "default",
-            "server": SERVER_NAME,
-        }, duration)
+        _child(TTS_GENERATION_DURATION_SECONDS, language, SERVER_NAME).observe(duration)
 
 
 def track_text_length(language: str, length: int):
     """Track text length for TTS request."""
-    observe_histogram(TTS_TEXT_LENGTH, {
-        "language": language,
-        "server": SERVER_NAME,
-    }, length)
+    _child(TTS_TEXT_LENGTH, language, SERVER_NAME).observe(length)
 
 
-def track_audio_size(language: str, locale: str, size_bytes: int):
+def track_audio_size(language: str, size_bytes: int):
     """Track generated audio size."""
-    observe_histogram(TTS_AUDIO_SIZE_BYTES, {
-        "language": language,
-        "locale": locale or "default",
-        "server": SERVER_NAME,
-    }, size_bytes)
+    _child(TTS_AUDIO_SIZE_BYTES, language, SERVER_NAME).observe(size_bytes)
 
 
-def track_voice_usage(language: str, locale: str, voice: str, gender: str, quality: str):
-    """Track voice usage."""
-    increment_counter(TTS_VOICE_USAGE_TOTAL, {
-        "language": language,
-        "locale": locale or "default",
-        "voice": voice,
-        "gender": gender,
-        "quality": quality,
-        "server": SERVER_NAME,
-    })
+def track_voice_usage(language: str, voice: str):
+    """Track voice usage. Gender/quality breakdowns are in the request logs."""
+    _child(TTS_VOICE_USAGE_TOTAL, language, voice, SERVER_NAME).inc()
 
 
-def set_active_generations(count: int):
-    """Set current active generations count."""
-    set_gauge(TTS_ACTIVE_GENERATIONS, {
-        "server": SERVER_NAME,
-    }, count)
+def track_active_generations(source: Callable[[], float]):
+    """Report active generations from source() whenever metrics are scraped."""
+    _child(TTS_ACTIVE_GENERATIONS, SERVER_NAME).set_function(source)
 
 
-def increment_active_generations():
-    """Increment active generations."""
-    TTS_ACTIVE_GENERATIONS.labels(server=SERVER_NAME).inc()
+def set_synthesis_load(in_flight: int, queued: int):
+    """Set synthesis in-flight and queue depth gauges."""
+    _child(TTS_SYNTHESIS_IN_FLIGHT, SERVER_NAME).set(in_flight)
+    _child(TTS_SYNTHESIS_QUEUE_DEPTH, SERVER_NAME).set(queued)
 
 
-def decrement_active_generations():
-    """Decrement active generations."""
-    TTS_ACTIVE_GENERATIONS.labels(server=SERVER_NAME).dec()
+def track_shed_request():
+    """Track request rejected by load shedding."""
+    increment_counter(TTS_SHED_REQUESTS_TOTAL, {
+        "server": SERVER_NAME,
+    })
+
+
+def warm_language_metrics(languages: Iterable[str]):
+    """
+    Create the per-language TTS metric children for every catalog language,
+    so requests find them in the _child cache and series start at zero.
+    """
+    for language in languages:
+        _child(TTS_GENERATION_DURATION_SECONDS, language, SERVER_NAME)
+        _child(TTS_TEXT_LENGTH, language, SERVER_NAME)
+        _child(TTS_AUDIO_SIZE_BYTES, language, SERVER_NAME)
 
 
 def set_catalog_stats(languages: int, voices: int):
@@ -233,12 +244,24 @@ def set_catalog_stats(languages: int, voices: int):
     set_gauge(TTS_VOICES_TOTAL, {"server": SERVER_NAME}, voices)
 
 
+# Errors counted since the last scrape, by error type. Error storms only bump
+# a dict entry; the Prometheus counter is updated once per type at scrape time.
+_pending_tts_errors: Tally = Tally()
+
+
 def track_tts_error(error_type: str):
     """Track TTS error."""
-    increment_counter(TTS_ERRORS_TOTAL, {
-        "error_type": error_type,
-        "server": SERVER_NAME,
-    })
+    _pending_tts_errors[error_type] += 1
+
+
+def flush_tts_errors():
+    """Move pending TTS error counts into the Prometheus counter."""
+    while _pending_tts_errors:
+        error_type, count = _pending_tts_errors.popitem()
+        increment_counter(TTS_ERRORS_TOTAL, {
+            "error_type": error_type,
+            "server": SERVER_NAME,
+        }, count)
 
 
 def track_blocked_request():
@@ -252,31 +275,43 @@ def track_blocked_request():
 # PATH NORMALIZATION
 # ============================================
 
-def normalize_path(path: str) -> str:
-    """Normalize path to avoid high cardinality."""
-    parts = path.split("/")
-    normalized = []
-    
-    for part in parts:
-        if not part:
-            continue
-        # Replace language codes (2-3 chars) after specific paths
-        # Keep them as-is for TTS paths since they're meaningful labels
-        normalized.append(part)
-    
-    return "/" + "/".join(normalized) if normalized else "/"
+def route_template(request: Request) -> str:
+    """
+    Get the matched route's path template (e.g. /piper/tts/languages/{language})
+    to keep endpoint label cardinality bounded by the number of routes.
+    Requests that matched no route are grouped as "unmatched".
+    """
+    route = request.scope.get("route")
+    return getattr(route, "path", None) or "unmatched"
 
 
 def get_status_class(status_code: int) -> str:
     """Get status class for grouping."""
-    if 200 <= status_code < 300:
-        return "2xx"
-    elif 300 <= status_code < 400:
-        return "3xx"
-    elif 400 <= status_code < 500:
-        return "4xx"
-    else:
-        return "5xx"
+    return f"{status_code // 100}xx"
+
+
+# ============================================
+# EXPOSITION
+# ============================================
+
+class _MetricFamily:
+    """Single collected metric family, in the registry interface generate_latest expects."""
+
+    def __init__(self, metric):
+        self.metric = metric
+
+    def collect(self):
+        return [self.metric]
+
+
+def iter_metrics() -> Iterator[bytes]:
+    """
+    Yield the exposition text one metric family at a time, so a scrape never
+    holds the whole output in memory. Sync on purpose: StreamingResponse runs
+    it in the threadpool, keeping collection off the event loop.
+    """
+    for metric in REGISTRY.collect():
+        yield generate_latest(_MetricFamily(metric))
 
 
 # ============================================
@@ -302,20 +337,17 @@ def setup_metrics(app: FastAPI, server_version: str = "2.2.0") -> None:
     
     @app.middleware("http")
     async def prometheus_middleware(request: Request, call_next: Callable):
-        method = request.method
-        path = normalize_path(request.url.path)
-        
-        # Skip metrics endpoint to avoid recursion
-        if path == "/metrics":
+        # Skip metrics endpoint to avoid recursion. Reads the raw scope path
+        # rather than request.url, which would build a URL object per request.
+        if request.scope["path"] == "/metrics":
             return await call_next(request)
         
-        HTTP_REQUESTS_IN_PROGRESS.labels(
-            method=method,
-            server=SERVER_NAME,
-        ).inc()
+        method = request.method
+        in_progress = _child(HTTP_REQUESTS_IN_PROGRESS, method, SERVER_NAME)
+        in_progress.inc()
         
         start_time = time.perf_counter()
-        status_code = 500
+        status_code = None
         
         try:
             response = await call_next(request)
@@ -323,32 +355,22 @@ def setup_metrics(app: FastAPI, server_version: str = "2.2.0") -> None:
             return response
         finally:
             duration = time.perf_counter() - start_time
+            # Route is only known once the router has handled the request
+            path = route_template(request)
             
-            increment_counter(HTTP_REQUESTS_TOTAL, {
-                "method": method,
-                "endpoint": path,
-                "status": get_status_class(status_code),
-                "server": SERVER_NAME,
-            })
-            
-            observe_histogram(HTTP_REQUEST_DURATION_SECONDS, {
-                "method": method,
-                "endpoint": path,
-                "server": SERVER_NAME,
-            }, duration)
-            
-            HTTP_REQUESTS_IN_PROGRESS.labels(
-                method=method,
-                server=SERVER_NAME,
-            ).dec()
+            # Exceptions escaping the app are not counted as a guessed status
+            if status_code is not None:
+                _child(
+                    HTTP_REQUESTS_TOTAL, method, path, get_status_class(status_code), SERVER_NAME
+                ).inc()
+            _child(HTTP_REQUEST_DURATION_SECONDS, method, path, SERVER_NAME).observe(duration)
+            in_progress.dec()
     
     @app.get("/metrics", include_in_schema=False)
     async def metrics_endpoint():
         """Prometheus metrics endpoint."""
-        return Response(
-            content=generate_latest(REGISTRY),
-            media_type=CONTENT_TYPE_LATEST,
-        )
+        flush_tts_errors()
+        return StreamingResponse(iter_metrics(), media_type=CONTENT_TYPE_LATEST)
     
     logger.info(
         "Prometheus metrics enabled",
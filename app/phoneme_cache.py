@@ -0,0 +1,46 @@
+# phoneme_cache.py
+# Path: /root/piper/app/phoneme_cache.py
+# In-memory LRU cache of phonemized text (phoneme IDs per sentence)
+
+import threading
+from collections import OrderedDict
+from typing import Hashable, List, Optional
+
+
+class PhonemeCache:
+    """
+    LRU cache of phoneme IDs so repeated texts skip espeak-ng phonemization.
+
+    Accessed from synthesis worker threads, so operations are locked.
+    """
+
+    def __init__(self, max_entries: int = 10000):
+        self.max_entries = max_entries
+        self._entries: "OrderedDict[Hashable, List[List[int]]]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key: Hashable) -> Optional[List[List[int]]]:
+        """Get cached phoneme IDs and mark them as recently used"""
+        with self._lock:
+            ids = self._entries.get(key)
+            if ids is not None:
+                self._entries.move_to_end(key)
+            return ids
+
+    def put(self, key: Hashable, ids: List[List[int]]) -> None:
+        """Store phoneme IDs, evicting the least recently used entries"""
+        if self.max_entries <= 0:
+            return
+        with self._lock:
+            self._entries[key] = ids
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def clear(self) -> None:
+        """Drop all cached phoneme IDs"""
+        with self._lock:
+            self._entries.clear()
+
+    def __len__(self) -> int:
+        return len(self._entries)
@@ -0,0 +1,61 @@
+# quantize_models.py
+# Path: /root/piper/app/quantize_models.py
+# Build-time step: write INT8 (dynamically quantized) copies of Piper voice models
+#
+# Usage (after setup.sh has downloaded the voices):
+#   python quantize_models.py [--include-conv] [models_dir]
+#
+# For every <voice>.onnx this writes <voice>.int8.onnx next to it. The server
+# loads the INT8 model instead of the FP32 one only when INT8_MODELS=true
+# (off by default).
+#
+# By default only MatMul/Gemm weights are quantized. --include-conv also
+# quantizes the Conv layers that make up most of the VITS decoder: smaller
+# models, but check speed and audio quality on the target CPU before using it.
+
+import argparse
+import sys
+from pathlib import Path
+
+from onnxruntime.quantization import QuantType, quantize_dynamic
+
+from config import settings, INT8_MODEL_SUFFIX
+
+
+def quantize_model(model_path: Path, include_conv: bool = False) -> Path:
+    """Quantize the weights of one model to INT8 and return the output path"""
+    output_path = model_path.with_suffix(INT8_MODEL_SUFFIX)
+    op_types = ["MatMul", "Gemm"] + (["Conv"] if include_conv else [])
+    quantize_dynamic(
+        model_path,
+        output_path,
+        weight_type=QuantType.QInt8,
+        op_types_to_quantize=op_types,
+    )
+    return output_path
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="Write INT8 copies of Piper voice models")
+    parser.add_argument("models_dir", nargs="?", type=Path, default=settings.models_dir)
+    parser.add_argument("--include-conv", action="store_true", help="Also quantize Conv layers")
+    args = parser.parse_args()
+
+    models_dir = args.models_dir
+    models = sorted(
+        path for path in models_dir.glob("*.onnx")
+        if not path.name.endswith(INT8_MODEL_SUFFIX)
+    )
+    if not models:
+        print(f"No models found in {models_dir}")
+        return 1
+
+    for model_path in models:
+        output_path = quantize_model(model_path, include_conv=args.include_conv)
+        ratio = output_path.stat().st_size / model_path.stat().st_size
+        print(f"{model_path.name} -> {output_path.name} ({ratio:.0%} of original size)")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,196 @@
+# synthesis.py
+# Path: /root/piper/app/synthesis.py
+# Voice loading and inference, shared by the in-process synthesis threads and the
+# optional worker processes. Spawned workers import only this module, so it must
+# not create service state (caches, pools) at import time.
+
+import os
+import hashlib
+import threading
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Tuple, Union
+
+import numpy as np
+import onnxruntime
+import orjson
+from piper import PiperVoice, PiperConfig, SynthesisConfig
+
+from config import settings
+from phoneme_cache import PhonemeCache
+
+# Length of the dummy phoneme sequence used to warm up a loaded voice
+WARMUP_PHONEME_IDS = 16
+
+# Name of the dynamic batch axis in Piper's exported ONNX models
+ONNX_BATCH_DIM = "batch_size"
+
+
+def _onnx_providers() -> List[Union[str, Tuple[str, Dict[str, Any]]]]:
+    """ONNX Runtime execution providers from settings, CPU always last as fallback"""
+    if settings.use_cuda:
+        return [
+            ("CUDAExecutionProvider", {
+                "device_id": settings.cuda_device_id,
+                "cudnn_conv_algo_search": "EXHAUSTIVE",
+            }),
+            "CPUExecutionProvider",
+        ]
+    return ["CPUExecutionProvider"]
+
+
+def load_voice(model_path: Path, config_path: Path) -> PiperVoice:
+    """Create a Piper voice with an ONNX session configured from settings"""
+    config = PiperConfig.from_dict(orjson.loads(config_path.read_bytes()))
+
+    sess_options = onnxruntime.SessionOptions()
+    sess_options.graph_optimization_level = onnxruntime.GraphOptimizationLevel.ORT_ENABLE_ALL
+    sess_options.enable_mem_pattern = True
+    # VITS is a single chain of nodes; parallel execution only adds an idle
+    # inter-op thread pool per session
+    sess_options.execution_mode = onnxruntime.ExecutionMode.ORT_SEQUENTIAL
+    # Sentences are always run one at a time; a fixed batch dimension lets
+    # onnxruntime plan shapes without the symbolic batch axis
+    sess_options.add_free_dimension_override_by_name(ONNX_BATCH_DIM, 1)
+    if settings.onnx_threads > 0:
+        sess_options.intra_op_num_threads = settings.onnx_threads
+
+    session = onnxruntime.InferenceSession(
+        str(model_path),
+        sess_options=sess_options,
+        providers=_onnx_providers(),
+    )
+    voice = PiperVoice(session=session, config=config)
+
+    # Run one short inference so kernel selection and memory arenas are set up
+    # before the first request uses this voice
+    voice.phoneme_ids_to_audio([0] * WARMUP_PHONEME_IDS, SynthesisConfig())
+    return voice
+
+
+def synthesize_text(
+    voice_key: str,
+    voice: PiperVoice,
+    text: str,
+    syn_config: SynthesisConfig,
+    phoneme_cache: PhonemeCache,
+) -> bytes:
+    """Synthesize text and return 16-bit PCM"""
+    return b"".join(
+        _ids_to_pcm(voice, ids, syn_config)
+        for ids in _phoneme_ids(voice_key, voice, text, phoneme_cache)
+    )
+
+
+def _phoneme_ids(
+    voice_key: str,
+    voice: PiperVoice,
+    text: str,
+    phoneme_cache: PhonemeCache,
+) -> List[List[int]]:
+    """Phonemize text into phoneme IDs per sentence, using the phoneme cache"""
+    key = (_phonemizer_key(voice_key, voice), text)
+    ids = phoneme_cache.get(key)
+    if ids is None:
+        ids = [
+            voice.phonemes_to_ids(phonemes)
+            for phonemes in voice.phonemize(text)
+            if phonemes
+        ]
+        phoneme_cache.put(key, ids)
+    return ids
+
+
+# voice_key -> digest of the config that determines phonemization
+_phonemizer_keys: Dict[str, bytes] = {}
+
+
+def clear_phonemizer_keys() -> None:
+    """Forget the phonemizer keys of unloaded voices"""
+    _phonemizer_keys.clear()
+
+
+def _phonemizer_key(voice_key: str, voice: PiperVoice) -> bytes:
+    """
+    Identify how a voice turns text into phoneme IDs, so voices sharing an
+    espeak-ng voice and phoneme ID map (e.g. qualities of one voice) share
+    phoneme cache entries.
+    """
+    key = _phonemizer_keys.get(voice_key)
+    if key is None:
+        config = voice.config
+        digest = hashlib.blake2b(digest_size=16)
+        digest.update(repr((
+            config.espeak_voice,
+            config.phoneme_type,
+            sorted((phoneme, list(ids)) for phoneme, ids in config.phoneme_id_map.items()),
+            sorted(config.vowel_clusters or ()),
+        )).encode("utf-8"))
+        key = _phonemizer_keys[voice_key] = digest.digest()
+    return key
+
+
+def _ids_to_pcm(voice: PiperVoice, ids: List[int], syn_config: SynthesisConfig) -> bytes:
+    """Run inference on phoneme IDs and return normalized 16-bit PCM (as PiperVoice.synthesize)"""
+    audio = voice.phoneme_ids_to_audio(ids, syn_config)
+
+    max_val = max(float(audio.max()), -float(audio.min()))
+    if max_val < 1e-8:
+        return bytes(2 * len(audio))
+
+    # Normalize and scale in one pass, in place on the inference output
+    np.multiply(audio, 32767 / max_val, out=audio)
+    np.clip(audio, -32767, 32767, out=audio)
+    pcm = _int16_buffer(len(audio))
+    np.copyto(pcm, audio, casting="unsafe")
+    return pcm.tobytes()
+
+
+# Per-thread scratch buffer for converting inference output to int16
+_scratch = threading.local()
+
+
+def _int16_buffer(length: int) -> np.ndarray:
+    """Get this thread's int16 scratch buffer, grown to at least length samples"""
+    buffer = getattr(_scratch, "int16", None)
+    if buffer is None or len(buffer) < length:
+        buffer = _scratch.int16 = np.empty(length, dtype=np.int16)
+    return buffer[:length]
+
+
+# State of a synthesis worker process (SYNTH_PROCESSES > 0)
+_process_voices: Dict[str, PiperVoice] = {}
+_process_phoneme_cache: Optional[PhonemeCache] = None
+
+
+def init_synth_process(phoneme_cache_size: int, next_slot: Optional[Any] = None) -> None:
+    """
+    Initialize a synthesis worker process. With next_slot (a shared counter),
+    the process is pinned to its own block of ONNX_THREADS CPUs.
+    """
+    global _process_phoneme_cache
+    _process_phoneme_cache = PhonemeCache(max_entries=phoneme_cache_size)
+
+    if next_slot is not None:
+        with next_slot.get_lock():
+            slot = next_slot.value
+            next_slot.value += 1
+        cpus = sorted(os.sched_getaffinity(0))
+        width = min(max(1, settings.onnx_threads), len(cpus))
+        start = slot * width % len(cpus)
+        os.sched_setaffinity(0, (cpus + cpus)[start:start + width])
+
+
+def process_synthesize(
+    voice_key: str,
+    model_path: Path,
+    config_path: Path,
+    text: str,
+    length_scale: float,
+    speaker: Optional[int],
+) -> bytes:
+    """Synthesize text in a worker process, loading the voice on first use"""
+    voice = _process_voices.get(voice_key)
+    if voice is None:
+        voice = _process_voices[voice_key] = load_voice(model_path, config_path)
+    syn_config = SynthesisConfig(speaker_id=speaker, length_scale=length_scale)
+    return synthesize_text(voice_key, voice, text, syn_config, _process_phoneme_cache)
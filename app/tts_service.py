@@ -2,24 +2,66 @@
 # /root/piper/app/tts_service.py
 # TTS service with hierarchical voice selection: Language → Locale → Gender → Voice
 
-import subprocess
+import os
+import re
+import time
+import logging
 import asyncio
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from contextlib import asynccontextmanager
+from copy import deepcopy
+from functools import lru_cache
 from pathlib import Path
-from typing import Optional, Dict, Any, List, BinaryIO
-from io import BytesIO
+from typing import Optional, Dict, Any, List, AsyncIterator, Callable, Tuple, Union
 from dataclasses import dataclass
 
-from config import settings, Gender, Quality, QUALITY_PRIORITY
+import lameenc
+import orjson
+from piper import PiperVoice, SynthesisConfig
+
+from config import (
+    settings, FlatVoiceEntry, INT8_MODEL_SUFFIX,
+    GENDER_VALUES, QUALITY_VALUES, GENDER_BY_VALUE, QUALITY_BY_VALUE,
+)
+from audio_cache import AudioCache, DiskAudioCache
+from phoneme_cache import PhonemeCache
+from synthesis import (
+    load_voice, synthesize_text, clear_phonemizer_keys,
+    init_synth_process, process_synthesize,
+)
 from log_config import get_logger
+from metrics import set_synthesis_load, track_active_generations, track_shed_request
 
 logger = get_logger(__name__)
 
+# Sentence boundaries: Latin terminators followed by whitespace, full-width and
+# Arabic terminators (usually not followed by a space), and line breaks
+SENTENCE_BOUNDARY = re.compile(r"(?<=[.!?…])\s+|(?<=[؟。！？])\s*|\n+")
+
+# Number of synthesized segments buffered ahead of the client
+PIPELINE_QUEUE_SIZE = 2
+
+# Output audio formats: MP3, or raw 16-bit little-endian mono PCM
+AUDIO_FORMATS = ("mp3", "pcm")
+
+# LAME encoder quality (0 = best/slowest, 9 = worst/fastest)
+MP3_ENCODER_QUALITY = 5
+
+# Voices loaded at once during preload (session creation is CPU-bound)
+PRELOAD_CONCURRENCY = max(1, min(4, os.cpu_count() or 1))
+
+
+def split_sentences(text: str) -> List[str]:
+    """Split text into non-empty sentence segments for pipelined synthesis"""
+    return [s.strip() for s in SENTENCE_BOUNDARY.split(text) if s and s.strip()]
+
 
 # =============================================================================
 # Custom Exceptions with Helpful Messages
 # =============================================================================
 
-@dataclass
+@dataclass(slots=True)
 class ErrorContext:
     """Context information for error messages"""
     requested: str
@@ -28,7 +70,14 @@ class ErrorContext:
 
 
 class TTSError(Exception):
-    """Base TTS error"""
+    """
+    Base TTS error.
+    Subclasses set the HTTP status, the error metric label and extra response headers.
+    """
+    status_code: int = 500
+    error_type: str = "tts_error"
+    headers: Optional[Dict[str, str]] = None
+
     def __init__(self, message: str, context: Optional[ErrorContext] = None):
         self.message = message
         self.context = context
@@ -46,37 +95,134 @@ class TTSError(Exception):
 
 class LanguageNotFoundError(TTSError):
     """Requested language not found"""
-    pass
+    status_code = 404
+    error_type = "language_not_found"
 
 
 class LocaleNotFoundError(TTSError):
     """Requested locale not found for language"""
-    pass
+    status_code = 404
+    error_type = "locale_not_found"
 
 
 class GenderNotFoundError(TTSError):
     """No voices found for requested gender"""
-    pass
+    status_code = 400
+    error_type = "gender_not_found"
 
 
 class VoiceNotFoundError(TTSError):
     """Requested voice not found"""
-    pass
+    status_code = 404
+    error_type = "voice_not_found"
 
 
 class QualityNotFoundError(TTSError):
     """Requested quality not available for voice"""
-    pass
+    status_code = 400
+    error_type = "quality_not_found"
 
 
 class TextValidationError(TTSError):
     """Text validation failed"""
-    pass
+    status_code = 400
+    error_type = "text_validation"
 
 
 class SynthesisError(TTSError):
     """Speech synthesis failed"""
-    pass
+    status_code = 500
+    error_type = "synthesis_error"
+
+
+class ServiceOverloadedError(TTSError):
+    """Too many requests are waiting for synthesis"""
+    status_code = 503
+    error_type = "service_overloaded"
+    headers = {"Retry-After": "1"}
+
+
+# =============================================================================
+# Synthesis Concurrency Limit
+# =============================================================================
+
+class SynthesisLimiter:
+    """
+    Bounds the number of segments synthesized at once.
+    New requests are shed once max_queue requests beyond the concurrency
+    limit are already in progress.
+    """
+
+    def __init__(self, max_concurrent: int, max_queue: int):
+        max_concurrent = max(1, max_concurrent)
+        self.max_requests = max_concurrent + max(0, max_queue)
+        self._semaphore = asyncio.Semaphore(max_concurrent)
+        self.requests = 0  # Admitted requests still synthesizing
+        self.in_flight = 0  # Segments holding a slot
+        self.waiting = 0  # Segments waiting for a slot
+
+    def admit(self) -> None:
+        """Admit a request, or raise ServiceOverloadedError if the queue is full"""
+        if self.requests >= self.max_requests:
+            track_shed_request()
+            raise ServiceOverloadedError(
+                "Server is busy, retry later",
+                ErrorContext(
+                    requested="speech synthesis",
+                    available=[],
+                    hint=f"{self.requests} requests in progress",
+                )
+            )
+        self.requests += 1
+
+    def release(self) -> None:
+        """Release a request admitted with admit()"""
+        self.requests -= 1
+
+    @asynccontextmanager
+    async def slot(self) -> AsyncIterator[None]:
+        """Wait for a synthesis slot and hold it for the duration of the block"""
+        self.waiting += 1
+        set_synthesis_load(self.in_flight, self.waiting)
+        try:
+            await self._semaphore.acquire()
+        finally:
+            self.waiting -= 1
+
+        self.in_flight += 1
+        set_synthesis_load(self.in_flight, self.waiting)
+        try:
+            yield
+        finally:
+            self.in_flight -= 1
+            self._semaphore.release()
+            set_synthesis_load(self.in_flight, self.waiting)
+
+
+# =============================================================================
+# Speech Stream
+# =============================================================================
+
+@dataclass
+class SpeechStream:
+    """
+    Audio for a resolved voice, produced sentence by sentence.
+    Iterate to receive the audio of each segment in order.
+    """
+    voice_key: str
+    segments: int
+    sample_rate: int
+    audio_format: str  # One of AUDIO_FORMATS
+    chunks: AsyncIterator[bytes]
+    audio: Optional[bytes] = None  # Complete audio when served from cache
+
+    def __aiter__(self) -> AsyncIterator[bytes]:
+        return self.chunks
+
+
+async def _iter_once(data: bytes) -> AsyncIterator[bytes]:
+    """Async iterator over a single chunk"""
+    yield data
 
 
 # =============================================================================
@@ -100,9 +246,49 @@ class TTSService:
     def __init__(self):
         self.models_dir = settings.models_dir
         self.catalog = settings.catalog
-        self.temp_dir = settings.temp_dir
         self.mp3_bitrate = settings.mp3_bitrate
+        self.mp3_bitrate_kbps = int(settings.mp3_bitrate.lower().rstrip("k"))
         self.default_sample_rate = settings.default_sample_rate
+        self._voices: Dict[str, PiperVoice] = {}  # voice_key -> loaded voice model
+        self._load_locks: Dict[str, asyncio.Lock] = {}
+        # cache key -> complete audio of the request synthesizing it (None if it failed)
+        self._inflight: Dict[bytes, asyncio.Future] = {}
+        self.cache = AudioCache(
+            max_entries=settings.audio_cache_size,
+            max_bytes=settings.audio_cache_mb * 1024 * 1024,
+        )
+        # Indexed at startup (main's lifespan), not here: this module is also
+        # imported by processes that never serve requests
+        self.disk_cache: Optional[DiskAudioCache] = None
+        if settings.audio_disk_cache_dir:
+            self.disk_cache = DiskAudioCache(
+                Path(settings.audio_disk_cache_dir),
+                max_bytes=settings.audio_disk_cache_mb * 1024 * 1024,
+            )
+        self.phoneme_cache = PhonemeCache(max_entries=settings.phoneme_cache_size)
+        self.limiter = SynthesisLimiter(
+            max_concurrent=settings.max_concurrent_synth,
+            max_queue=settings.max_synth_queue,
+        )
+        track_active_generations(lambda: self.limiter.requests)
+        # Dedicated threads for ONNX inference, separate from the default executor
+        self.synth_pool = ThreadPoolExecutor(
+            max_workers=settings.synth_workers,
+            thread_name_prefix="synth",
+        )
+        # Optional inference threads of each voice's own (voice_key -> pool)
+        self._voice_pools: Dict[str, ThreadPoolExecutor] = {}
+        # Optional worker processes for inference (each loads its own voices)
+        self.process_pool: Optional[ProcessPoolExecutor] = None
+        if settings.synth_processes > 0:
+            mp_context = multiprocessing.get_context("spawn")
+            next_slot = mp_context.Value("i", 0) if settings.pin_synth_processes else None
+            self.process_pool = ProcessPoolExecutor(
+                max_workers=settings.synth_processes,
+                mp_context=mp_context,
+                initializer=init_synth_process,
+                initargs=(settings.phoneme_cache_size, next_slot),
+            )
 
     async def generate_speech(
         self,
@@ -114,10 +300,16 @@ class TTSService:
         quality: Optional[str] = None,
         speed: float = 1.0,
         speaker_id: int = 0,
-    ) -> BinaryIO:
+        audio_format: str = "mp3",
+    ) -> SpeechStream:
         """
         Generate speech audio from text.
-        
+
+        Text is split into sentences which are synthesized in a pipeline:
+        the first segment is awaited before returning (so synthesis errors
+        surface as regular exceptions), later segments are synthesized while
+        earlier ones are being sent to the client.
+
         Args:
             text: Text to synthesize (required)
             language: Language code, e.g., "en", "de", "fa" (required)
@@ -127,10 +319,11 @@ class TTSService:
             quality: Quality level: "high", "medium", "low", "x_low" (optional)
             speed: Speech rate 0.5-2.0 (default: 1.0)
             speaker_id: Speaker ID for multi-speaker models (default: 0)
+            audio_format: "mp3" or "pcm" (16-bit little-endian mono) (default: "mp3")
             
         Returns:
-            BytesIO containing MP3 audio data
-            
+            SpeechStream yielding audio data per sentence
+
         Raises:
             LanguageNotFoundError: Language not supported
             LocaleNotFoundError: Locale not found for language
@@ -147,7 +340,7 @@ class TTSService:
         speed = max(settings.min_speed, min(settings.max_speed, speed))
 
         # Resolve voice through hierarchy
-        resolved = self._resolve_voice_hierarchy(
+        _, _, _, variant = self._resolve_voice_hierarchy(
             language=language,
             locale=locale,
             gender=gender,
@@ -155,33 +348,232 @@ class TTSService:
             quality=quality,
         )
 
-        lang, loc, v, variant = resolved
+        # Identical requests are served from the audio cache (memory, then disk)
+        cache_key = AudioCache.make_key(
+            variant.full_key, text, speed, speaker_id, audio_format,
+            bitrate=self.mp3_bitrate if audio_format == "mp3" else "",
+        )
+        cached = self.cache.get(cache_key)
+        if cached is None and self.disk_cache is not None:
+            cached = await self.disk_cache.get(cache_key)
+            if cached is not None:
+                self.cache.put(cache_key, cached)
+        if cached is None and cache_key in self._inflight:
+            # The same audio is already being synthesized - wait a bounded time
+            # for it instead of synthesizing it twice. If that request fails, is
+            # cancelled or takes too long, fall through and synthesize.
+            try:
+                cached = await asyncio.wait_for(
+                    asyncio.shield(self._inflight[cache_key]),
+                    settings.inflight_wait_timeout,
+                )
+            except TimeoutError:
+                pass
+        if cached is not None:
+            if logger.isEnabledFor(logging.DEBUG):
+                logger.debug(
+                    "Serving cached speech",
+                    extra={"voice_key": variant.full_key, "text_length": len(text)},
+                )
+            return SpeechStream(
+                voice_key=variant.full_key,
+                segments=1,
+                sample_rate=variant.sample_rate,
+                audio_format=audio_format,
+                chunks=_iter_once(cached),
+                audio=cached,
+            )
 
-        logger.info(
-            "Generating speech",
-            extra={
-                "language": lang.code,
-                "locale": loc.code,
-                "voice": v.name,
-                "gender": v.gender.value,
-                "quality": variant.quality.value,
-                "speed": speed,
-                "text_length": len(text),
-                "speaker_id": speaker_id,
-            },
+        segments = split_sentences(text)
+
+        # Shed load before doing any work
+        self.limiter.admit()
+
+        # Identical requests arriving meanwhile share this request's audio, as
+        # they would through the cache once it is stored (only with a cache)
+        result: Optional[asyncio.Future] = None
+        if self.cache.max_entries > 0 or self.disk_cache is not None:
+            result = asyncio.get_running_loop().create_future()
+            self._inflight[cache_key] = result
+
+        # Start the synthesis pipeline and wait for the first segment
+        queue: asyncio.Queue = asyncio.Queue(maxsize=PIPELINE_QUEUE_SIZE)
+        producer = asyncio.create_task(
+            self._produce_segments(
+                queue,
+                segments,
+                cache_key=cache_key,
+                result=result,
+                voice_key=variant.full_key,
+                sample_rate=variant.sample_rate,
+                audio_format=audio_format,
+                speed=speed,
+                speaker_id=speaker_id,
+                num_speakers=variant.num_speakers,
+            )
         )
 
-        # Generate audio
-        audio_data = await self._synthesize(
-            text=text,
-            model_path=str(self.models_dir / variant.model_file),
+        def finished(_: asyncio.Task) -> None:
+            # Runs even if the producer is cancelled before it starts. The
+            # producer ends when the stream completes, fails, is closed or is
+            # abandoned (STREAM_STALL_TIMEOUT), so the entry is always released
+            self.limiter.release()
+            if result is not None:
+                if self._inflight.get(cache_key) is result:
+                    del self._inflight[cache_key]
+                if not result.done():
+                    result.set_result(None)
+
+        producer.add_done_callback(finished)
+
+        try:
+            first = await queue.get()
+        except BaseException:
+            # Request cancelled before the first segment was ready
+            producer.cancel()
+            raise
+        if isinstance(first, Exception):
+            raise first
+
+        return SpeechStream(
+            voice_key=variant.full_key,
+            segments=len(segments),
             sample_rate=variant.sample_rate,
-            speed=speed,
-            speaker_id=speaker_id,
-            num_speakers=variant.num_speakers,
+            audio_format=audio_format,
+            chunks=self._drain_segments(queue, producer, first),
         )
 
-        return audio_data
+    async def _produce_segments(
+        self,
+        queue: asyncio.Queue,
+        segments: List[str],
+        cache_key: bytes,
+        result: Optional[asyncio.Future],
+        sample_rate: int,
+        audio_format: str,
+        **synth_args: Any,
+    ) -> None:
+        """
+        Encode synthesized segments in order and put their audio on the queue.
+        The complete audio is cached, and handed to identical requests waiting
+        on result, before the end of the stream is signalled.
+
+        Synthesis runs as a separate stage, so the next segment is being
+        synthesized while the current one is encoded. For MP3, one encoder
+        spans all segments, so they form a single stream; PCM is passed on
+        as synthesized.
+        Puts the raised exception instead of audio on failure, and None when done.
+        """
+        pcm_queue: asyncio.Queue = asyncio.Queue(maxsize=PIPELINE_QUEUE_SIZE)
+        synth = asyncio.create_task(
+            self._synthesize_segments(pcm_queue, segments, **synth_args)
+        )
+        chunks: List[bytes] = []
+        try:
+            encoder = self._new_encoder(sample_rate) if audio_format == "mp3" else None
+            while (pcm_data := await pcm_queue.get()) is not None:
+                if isinstance(pcm_data, Exception):
+                    raise pcm_data
+                audio = await self._encode_mp3(encoder.encode, pcm_data) if encoder else pcm_data
+                if audio:
+                    chunks.append(audio)
+                    await self._put_segment(queue, audio)
+            if encoder:
+                audio = await self._encode_mp3(encoder.flush)
+                if audio:
+                    chunks.append(audio)
+                    await self._put_segment(queue, audio)
+            audio = b"".join(chunks)
+            # Hand the audio to waiting identical requests, even if it is too
+            # large for the cache
+            if result is not None:
+                result.set_result(audio)
+            self.cache.put(cache_key, audio)
+            if self.disk_cache is not None:
+                await self.disk_cache.put(cache_key, audio)
+        except TimeoutError:
+            self._abandon_stream(queue, synth_args.get("voice_key"))
+            return
+        except Exception as e:
+            end: Optional[Exception] = e
+        else:
+            end = None
+        finally:
+            # Encoding failed, the client stalled or the request was cancelled -
+            # stop synthesizing
+            if not synth.done():
+                synth.cancel()
+        try:
+            await self._put_segment(queue, end)
+        except TimeoutError:
+            self._abandon_stream(queue, synth_args.get("voice_key"))
+
+    @staticmethod
+    async def _put_segment(queue: asyncio.Queue, item: Union[bytes, Exception, None]) -> None:
+        """
+        Put an item on the pipeline queue, raising TimeoutError if the client
+        has not made room within STREAM_STALL_TIMEOUT. A stream that is never
+        read would otherwise keep its producer and synthesis slot forever.
+        """
+        await asyncio.wait_for(queue.put(item), settings.stream_stall_timeout)
+        # On Python 3.11, wait_for drops a cancellation that arrives in the
+        # same loop iteration as the put completes; re-raise it so a client
+        # closing the stream still stops the producer
+        if asyncio.current_task().cancelling():
+            raise asyncio.CancelledError
+
+    @staticmethod
+    def _abandon_stream(queue: asyncio.Queue, voice_key: Optional[str]) -> None:
+        """Give up on a stream the client stopped reading"""
+        logger.warning(
+            "Speech stream abandoned by the client",
+            extra={"voice_key": voice_key, "timeout_s": settings.stream_stall_timeout},
+        )
+        # Drop the unread audio so a late reader gets the error, not a hang
+        while not queue.empty():
+            queue.get_nowait()
+        queue.put_nowait(SynthesisError("Speech stream was not read in time"))
+
+    async def _synthesize_segments(
+        self,
+        pcm_queue: asyncio.Queue,
+        segments: List[str],
+        **synth_args: Any,
+    ) -> None:
+        """
+        Synthesis stage: put 16-bit PCM for each segment on the queue.
+        Puts the raised exception instead of audio on failure, and None when done.
+        """
+        try:
+            for segment in segments:
+                async with self.limiter.slot():
+                    pcm_data = await self._synthesize(text=segment, **synth_args)
+                # Nothing to speak in this segment (e.g. only punctuation)
+                if pcm_data:
+                    await pcm_queue.put(pcm_data)
+        except Exception as e:
+            await pcm_queue.put(e)
+            return
+        await pcm_queue.put(None)
+
+    async def _drain_segments(
+        self,
+        queue: asyncio.Queue,
+        producer: asyncio.Task,
+        first: bytes,
+    ) -> AsyncIterator[bytes]:
+        """Yield segment audio from the pipeline queue until the producer is done"""
+        item: Union[bytes, Exception, None] = first
+        try:
+            while item is not None:
+                if isinstance(item, Exception):
+                    raise item
+                yield item
+                item = await queue.get()
+        finally:
+            # Client went away or synthesis failed - stop synthesizing
+            if not producer.done():
+                producer.cancel()
 
     def _validate_text(self, text: str) -> None:
         """Validate input text"""
@@ -205,6 +597,7 @@ class TTSService:
                 )
             )
 
+    @lru_cache(maxsize=1024)
     def _resolve_voice_hierarchy(
         self,
         language: str,
@@ -215,19 +608,19 @@ class TTSService:
     ) -> tuple:
         """
         Resolve voice through hierarchy with detailed errors.
+        Results are memoized until the catalog is reloaded; errors are not.
         
         Returns: (Language, Locale, Voice, VoiceVariant)
         """
         # Step 1: Get Language
         lang = self.catalog.get_language(language)
         if not lang:
-            available_langs = list(self.catalog.languages.keys())
             raise LanguageNotFoundError(
                 f"Language '{language}' not found",
                 ErrorContext(
                     requested=language,
-                    available=sorted(available_langs),
-                    hint=f"Use one of: {', '.join(sorted(available_langs)[:10])}{'...' if len(available_langs) > 10 else ''}",
+                    available=self.catalog.language_codes,
+                    hint=self.catalog.language_hint,
                 )
             )
 
@@ -259,28 +652,26 @@ class TTSService:
         # Step 3: Filter by Gender (if specified)
         gender_enum = None
         if gender:
-            try:
-                gender_enum = Gender(gender.lower())
-            except ValueError:
+            gender_enum = GENDER_BY_VALUE.get(gender.lower())
+            if gender_enum is None:
                 raise GenderNotFoundError(
                     f"Invalid gender '{gender}'",
                     ErrorContext(
                         requested=gender,
-                        available=[g.value for g in Gender],
+                        available=GENDER_VALUES,
                         hint="Use 'male', 'female', or 'neutral'",
                     )
                 )
 
-            # Check if any voices match gender
-            gender_voices = loc.get_voices(gender_enum)
-            if not gender_voices:
-                available_genders = list(loc.voices_by_gender.keys())
+            # Check if any voices match gender (only non-empty genders are keys)
+            if gender_enum.value not in loc.voice_names_by_gender:
+                available_genders = list(loc.voice_names_by_gender)
                 raise GenderNotFoundError(
                     f"No {gender} voices available for {language}-{loc.code}",
                     ErrorContext(
                         requested=gender,
-                        available=[g.value for g in available_genders],
-                        hint=f"Available genders for {lang.name} ({loc.name}): {', '.join(g.value for g in available_genders)}",
+                        available=available_genders,
+                        hint=f"Available genders for {lang.name} ({loc.name}): {', '.join(available_genders)}",
                     )
                 )
 
@@ -321,21 +712,20 @@ class TTSService:
 
         # Step 5: Get Quality Variant
         if quality:
-            try:
-                quality_enum = Quality(quality.lower())
-            except ValueError:
+            quality_enum = QUALITY_BY_VALUE.get(quality.lower())
+            if quality_enum is None:
                 raise QualityNotFoundError(
                     f"Invalid quality '{quality}'",
                     ErrorContext(
                         requested=quality,
-                        available=[q.value for q in Quality],
+                        available=QUALITY_VALUES,
                         hint="Use 'high', 'medium', 'low', or 'x_low'",
                     )
                 )
 
             variant = v.get_variant(quality_enum)
             if not variant:
-                available_qualities = [q.value for q in v.available_qualities]
+                available_qualities = v.quality_values
                 raise QualityNotFoundError(
                     f"Quality '{quality}' not available for voice '{v.name}'",
                     ErrorContext(
@@ -358,151 +748,205 @@ class TTSService:
 
         return (lang, loc, v, variant)
 
-    async def _synthesize(
-        self,
-        text: str,
-        model_path: str,
-        sample_rate: int,
-        speed: float,
-        speaker_id: int,
-        num_speakers: int,
-    ) -> BinaryIO:
+    # =========================================================================
+    # Voice Models
+    # =========================================================================
+
+    def _model_paths(self, voice_key: str) -> Tuple[Path, Path]:
+        """Get the model and config file paths for a voice key"""
+        resolved = self.catalog.find_by_voice_key(voice_key)
+        if not resolved:
+            raise VoiceNotFoundError(
+                f"Voice '{voice_key}' not found",
+                ErrorContext(
+                    requested=voice_key,
+                    available=[],
+                    hint="Use a full voice key like 'en_US-lessac-high'",
+                )
+            )
+        variant = resolved[3]
+        model_path = self.models_dir / variant.model_file
+        if settings.int8_models:
+            int8_path = model_path.with_suffix(INT8_MODEL_SUFFIX)
+            if int8_path.exists():
+                model_path = int8_path
+        return model_path, self.models_dir / variant.config_file
+
+    async def ensure_loaded(self, voice_key: str) -> PiperVoice:
         """
-        Run Piper TTS synthesis and return MP3 audio.
-        
-        Piper automatically finds the .onnx.json config file next to the model.
-        Uses: echo "text" | piper --model X --output_file Y
+        Get the loaded voice model for a voice key (e.g., en_US-lessac-high),
+        loading it on first use. Concurrent callers share a single load.
         """
-        try:
-            # Ensure temp directory exists
-            self.temp_dir.mkdir(parents=True, exist_ok=True)
-            
-            # Create temp files for audio pipeline
-            wav_path = self.temp_dir / f"tts_{id(text)}_{hash(text) % 10000}.wav"
-            mp3_path = self.temp_dir / f"tts_{id(text)}_{hash(text) % 10000}.mp3"
+        voice = self._voices.get(voice_key)
+        if voice is not None:
+            return voice
 
-            try:
-                # Build piper command
-                # Note: Piper automatically loads .onnx.json config from same directory
-                piper_cmd = [
-                    "piper",
-                    "--model", model_path,
-                    "--output_file", str(wav_path),
-                    "--length_scale", str(1.0 / speed),  # Piper uses length_scale (inverse of speed)
-                ]
-
-                # Add speaker ID for multi-speaker models
-                if num_speakers > 1 and speaker_id > 0:
-                    piper_cmd.extend(["--speaker", str(speaker_id)])
+        lock = self._load_locks.setdefault(voice_key, asyncio.Lock())
+        async with lock:
+            voice = self._voices.get(voice_key)
+            if voice is not None:
+                return voice
 
-                logger.debug(
-                    "Running piper command",
-                    extra={
-                        "command": " ".join(piper_cmd),
-                        "model": Path(model_path).name,
-                    },
-                )
+            model_path, config_path = self._model_paths(voice_key)
 
-                # Run piper with text as stdin
-                process = await asyncio.create_subprocess_exec(
-                    *piper_cmd,
-                    stdin=asyncio.subprocess.PIPE,
-                    stdout=asyncio.subprocess.PIPE,
-                    stderr=asyncio.subprocess.PIPE,
+            start_time = time.perf_counter()
+            try:
+                voice = await asyncio.to_thread(load_voice, model_path, config_path)
+            except Exception as e:
+                logger.error(
+                    "Failed to load voice model",
+                    extra={"voice_key": voice_key, "error": str(e)},
                 )
-
-                stdout, stderr = await process.communicate(input=text.encode("utf-8"))
-
-                if process.returncode != 0:
-                    error_msg = stderr.decode("utf-8", errors="replace")
-                    logger.error(
-                        "Piper synthesis failed",
-                        extra={
-                            "model": Path(model_path).name,
-                            "return_code": process.returncode,
-                            "stderr": error_msg[:500],
-                        },
-                    )
-                    raise SynthesisError(
-                        f"Speech synthesis failed: {error_msg[:200]}",
-                        ErrorContext(
-                            requested=f"model={Path(model_path).name}",
-                            available=[],
-                            hint="Check if model file exists and is valid",
-                        )
-                    )
-
-                # Check if WAV file was created
-                if not wav_path.exists():
-                    raise SynthesisError(
-                        "Piper did not produce output audio",
-                        ErrorContext(
-                            requested=f"model={Path(model_path).name}",
-                            available=[],
-                            hint="Model may be corrupted or incompatible",
-                        )
+                raise SynthesisError(
+                    f"Failed to load voice model '{voice_key}'",
+                    ErrorContext(
+                        requested=voice_key,
+                        available=[],
+                        hint="Check if model file exists and is valid",
                     )
-
-                # Convert WAV to MP3 with ffmpeg using configured bitrate
-                ffmpeg_cmd = [
-                    "ffmpeg",
-                    "-y",  # Overwrite output
-                    "-i", str(wav_path),
-                    "-codec:a", "libmp3lame",
-                    "-b:a", self.mp3_bitrate,  # Use configured bitrate
-                    "-ar", str(sample_rate),  # Use model's sample rate
-                    "-ac", "1",  # Mono audio
-                    "-loglevel", "error",
-                    str(mp3_path),
-                ]
-
-                logger.debug(
-                    "Running ffmpeg conversion",
-                    extra={
-                        "bitrate": self.mp3_bitrate,
-                        "sample_rate": sample_rate,
-                    },
                 )
 
-                process = await asyncio.create_subprocess_exec(
-                    *ffmpeg_cmd,
-                    stdout=asyncio.subprocess.PIPE,
-                    stderr=asyncio.subprocess.PIPE,
+            self._voices[voice_key] = voice
+            logger.info(
+                "Voice model loaded",
+                extra={
+                    "voice_key": voice_key,
+                    "load_ms": round((time.perf_counter() - start_time) * 1000, 2),
+                },
+            )
+            return voice
+
+    async def preload_voices(self, voice_keys: List[str]) -> None:
+        """Load voice models ahead of the first request, logging failures"""
+        if self.process_pool is not None:
+            # Worker processes load voices on first use
+            return
+        semaphore = asyncio.Semaphore(PRELOAD_CONCURRENCY)
+
+        async def load(key: str) -> PiperVoice:
+            async with semaphore:
+                return await self.ensure_loaded(key)
+
+        results = await asyncio.gather(
+            *(load(key) for key in voice_keys),
+            return_exceptions=True,
+        )
+        for key, result in zip(voice_keys, results):
+            if isinstance(result, Exception):
+                logger.warning(
+                    "Failed to preload voice",
+                    extra={"voice_key": key, "error": str(result)},
                 )
 
-                stdout, stderr = await process.communicate()
-
-                if process.returncode != 0:
-                    error_msg = stderr.decode("utf-8", errors="replace")
-                    logger.error(
-                        "FFmpeg encoding failed",
-                        extra={
-                            "return_code": process.returncode,
-                            "stderr": error_msg[:500],
-                        },
-                    )
-                    raise SynthesisError(
-                        "Audio encoding failed",
-                        ErrorContext(
-                            requested="MP3 encoding",
-                            available=[],
-                            hint=f"FFmpeg error: {error_msg[:100]}",
-                        )
+    async def warm_prompts(self, prompts_file: Path) -> None:
+        """
+        Synthesize known prompts into the audio cache so their first request
+        is a cache hit. The file maps language codes to lists of texts, which
+        are synthesized with the language's default voice at normal speed.
+        """
+        try:
+            prompts: Dict[str, List[str]] = orjson.loads(prompts_file.read_bytes())
+        except (OSError, orjson.JSONDecodeError) as e:
+            logger.warning(
+                "Failed to read warmup prompts",
+                extra={"file": str(prompts_file), "error": str(e)},
+            )
+            return
+
+        start_time = time.perf_counter()
+        warmed = 0
+        for language, texts in prompts.items():
+            for text in texts:
+                try:
+                    stream = await self.generate_speech(text=text, language=language)
+                    # Draining the stream stores the complete audio in the cache
+                    async for _ in stream:
+                        pass
+                    warmed += 1
+                except TTSError as e:
+                    logger.warning(
+                        "Failed to warm prompt",
+                        extra={"language": language, "text_length": len(text), "error": str(e)},
                     )
+        logger.info(
+            "Warmup prompts cached",
+            extra={
+                "prompts": warmed,
+                "duration_ms": round((time.perf_counter() - start_time) * 1000, 2),
+            },
+        )
 
-                # Read MP3 data into memory
-                with open(mp3_path, "rb") as f:
-                    audio_data = BytesIO(f.read())
+    def prefetch_models(self) -> int:
+        """
+        Ask the kernel to read every model file into the page cache, so voices
+        loaded on first use do not wait for the disk. Returns the number of files.
+        """
+        count = 0
+        for model_path in self.models_dir.glob("*.onnx"):
+            if model_path.name.endswith(INT8_MODEL_SUFFIX):
+                if not settings.int8_models:
+                    continue
+            elif settings.int8_models and model_path.with_suffix(INT8_MODEL_SUFFIX).exists():
+                # The INT8 copy is loaded instead
+                continue
+            fd = os.open(model_path, os.O_RDONLY)
+            try:
+                os.posix_fadvise(fd, 0, 0, os.POSIX_FADV_WILLNEED)
+            finally:
+                os.close(fd)
+            count += 1
+        return count
+
+    def get_default_voice_key(self) -> Optional[str]:
+        """Get the voice key selected by the configured defaults"""
+        resolved = self.catalog.resolve_voice(
+            language=settings.default_language,
+            locale=settings.default_locale,
+            voice=settings.default_voice,
+            quality=settings.default_quality,
+        )
+        return resolved[3].full_key if resolved else None
+
+    def unload_voices(self) -> None:
+        """Release all loaded voice models and their ONNX sessions"""
+        self._voices.clear()
+        self.phoneme_cache.clear()
+        clear_phonemizer_keys()
+        self._load_locks.clear()
+
+    def shutdown(self) -> None:
+        """Stop the inference threads and processes and release loaded voices"""
+        self.synth_pool.shutdown(wait=False, cancel_futures=True)
+        for pool in self._voice_pools.values():
+            pool.shutdown(wait=False, cancel_futures=True)
+        self._voice_pools.clear()
+        if self.process_pool is not None:
+            self.process_pool.shutdown(wait=False, cancel_futures=True)
+        self.unload_voices()
 
-                audio_data.seek(0)
-                return audio_data
+    # =========================================================================
+    # Synthesis
+    # =========================================================================
 
-            finally:
-                # Cleanup temp files
-                if wav_path.exists():
-                    wav_path.unlink(missing_ok=True)
-                if mp3_path.exists():
-                    mp3_path.unlink(missing_ok=True)
+    async def _synthesize(
+        self,
+        text: str,
+        voice_key: str,
+        speed: float,
+        speaker_id: int,
+        num_speakers: int,
+    ) -> bytes:
+        """
+        Run Piper TTS synthesis and return 16-bit mono PCM.
+        Each segment is submitted to the inference pool on its own, so
+        concurrent segments run in parallel even for the same voice.
+        """
+        try:
+            # Speaker ID only applies to multi-speaker models
+            speaker = speaker_id if num_speakers > 1 and speaker_id > 0 else None
+
+            # Piper uses length_scale (inverse of speed)
+            return await self._run_inference(voice_key, text, 1.0 / speed, speaker)
 
         except SynthesisError:
             raise
@@ -510,7 +954,7 @@ class TTSService:
             logger.exception(
                 "Unexpected synthesis error",
                 extra={
-                    "model": Path(model_path).name if model_path else "unknown",
+                    "voice_key": voice_key,
                     "text_length": len(text),
                 },
             )
@@ -523,9 +967,101 @@ class TTSService:
                 )
             )
 
+    async def _run_inference(
+        self,
+        voice_key: str,
+        text: str,
+        length_scale: float,
+        speaker: Optional[int],
+    ) -> bytes:
+        """Synthesize text with a voice in the process or thread pool and return 16-bit PCM"""
+        loop = asyncio.get_running_loop()
+
+        if logger.isEnabledFor(logging.DEBUG):
+            logger.debug(
+                "Running piper synthesis",
+                extra={
+                    "voice_key": voice_key,
+                    "text_length": len(text),
+                },
+            )
+
+        if self.process_pool is not None:
+            model_path, config_path = self._model_paths(voice_key)
+            return await loop.run_in_executor(
+                self.process_pool, process_synthesize,
+                voice_key, model_path, config_path, text, length_scale, speaker,
+            )
+
+        voice = await self.ensure_loaded(voice_key)
+        syn_config = SynthesisConfig(speaker_id=speaker, length_scale=length_scale)
+
+        # Inference is CPU-bound - keep it off the event loop
+        return await loop.run_in_executor(
+            self._voice_executor(voice_key), synthesize_text,
+            voice_key, voice, text, syn_config, self.phoneme_cache,
+        )
+
+    def _voice_executor(self, voice_key: str) -> ThreadPoolExecutor:
+        """
+        Get the threads that run inference for a voice: the shared pool, or
+        with VOICE_WORKERS set, threads dedicated to the voice so a busy voice
+        cannot hold up the others.
+        """
+        if settings.voice_workers <= 0:
+            return self.synth_pool
+        pool = self._voice_pools.get(voice_key)
+        if pool is None:
+            pool = ThreadPoolExecutor(
+                max_workers=settings.voice_workers,
+                thread_name_prefix=f"synth-{voice_key}",
+            )
+            self._voice_pools[voice_key] = pool
+        return pool
+
+    def _new_encoder(self, sample_rate: int) -> lameenc.Encoder:
+        """Create an MP3 encoder for one 16-bit mono PCM stream"""
+        encoder = lameenc.Encoder()
+        encoder.set_bit_rate(self.mp3_bitrate_kbps)
+        encoder.set_in_sample_rate(sample_rate)  # Use model's sample rate
+        encoder.set_channels(1)  # Mono audio
+        encoder.set_quality(MP3_ENCODER_QUALITY)
+        return encoder
+
+    async def _encode_mp3(self, encode: Callable[..., bytes], *pcm_data: bytes) -> bytes:
+        """Run an encoder step (encode or flush) in a worker thread and return MP3 bytes"""
+        try:
+            return bytes(await asyncio.to_thread(encode, *pcm_data))
+        except Exception as e:
+            logger.error(
+                "MP3 encoding failed",
+                extra={
+                    "bitrate": self.mp3_bitrate,
+                    "error": str(e),
+                },
+            )
+            raise SynthesisError(
+                "Audio encoding failed",
+                ErrorContext(
+                    requested="MP3 encoding",
+                    available=[],
+                    hint=f"Encoder error: {str(e)[:100]}",
+                )
+            )
+
     # =========================================================================
     # Catalog Query Methods
     # =========================================================================
+    # The memoized results are shared between requests, so the public methods
+    # return copies that callers are free to modify. Call clear_caches() after
+    # the catalog is (re)loaded.
+
+    def clear_caches(self) -> None:
+        """Drop memoized catalog query results"""
+        self._resolve_voice_hierarchy.cache_clear()
+        self._get_locales.cache_clear()
+        self._get_voices.cache_clear()
+        self._get_voice_details.cache_clear()
 
     def get_languages(self) -> List[Dict[str, Any]]:
         """Get all supported languages"""
@@ -533,24 +1069,48 @@ class TTSService:
 
     def get_locales(self, language: str) -> List[Dict[str, Any]]:
         """Get locales for a language"""
+        return deepcopy(self._get_locales(language))
+
+    def get_voices(
+        self,
+        language: str,
+        locale: str,
+        gender: Optional[str] = None,
+    ) -> List[Dict[str, Any]]:
+        """Get voices for a locale"""
+        return deepcopy(self._get_voices(language, locale, gender))
+
+    def get_voice_details(
+        self,
+        language: str,
+        locale: str,
+        voice_name: str,
+    ) -> Dict[str, Any]:
+        """Get detailed info about a specific voice"""
+        return deepcopy(self._get_voice_details(language, locale, voice_name))
+
+    @lru_cache(maxsize=1024)
+    def _get_locales(self, language: str) -> List[Dict[str, Any]]:
+        """Memoized get_locales"""
         lang = self.catalog.get_language(language)
         if not lang:
             raise LanguageNotFoundError(
                 f"Language '{language}' not found",
                 ErrorContext(
                     requested=language,
-                    available=list(self.catalog.languages.keys()),
+                    available=self.catalog.language_codes,
                 )
             )
         return self.catalog.list_locales(language)
 
-    def get_voices(
+    @lru_cache(maxsize=1024)
+    def _get_voices(
         self,
         language: str,
         locale: str,
-        gender: Optional[str] = None,
+        gender: Optional[str],
     ) -> List[Dict[str, Any]]:
-        """Get voices for a locale"""
+        """Memoized get_voices"""
         # Validate language
         lang = self.catalog.get_language(language)
         if not lang:
@@ -558,7 +1118,7 @@ class TTSService:
                 f"Language '{language}' not found",
                 ErrorContext(
                     requested=language,
-                    available=list(self.catalog.languages.keys()),
+                    available=self.catalog.language_codes,
                 )
             )
 
@@ -575,13 +1135,14 @@ class TTSService:
 
         return self.catalog.list_voices(language, locale, gender)
 
-    def get_voice_details(
+    @lru_cache(maxsize=1024)
+    def _get_voice_details(
         self,
         language: str,
         locale: str,
         voice_name: str,
     ) -> Dict[str, Any]:
-        """Get detailed info about a specific voice"""
+        """Memoized get_voice_details"""
         voice = self.catalog.get_voice(language, locale, voice_name)
         if not voice:
             # Determine what's missing
@@ -589,7 +1150,7 @@ class TTSService:
             if not lang:
                 raise LanguageNotFoundError(
                     f"Language '{language}' not found",
-                    ErrorContext(requested=language, available=list(self.catalog.languages.keys())),
+                    ErrorContext(requested=language, available=self.catalog.language_codes),
                 )
             loc = lang.get_locale(locale)
             if not loc:
@@ -615,9 +1176,13 @@ class TTSService:
                 }
                 for q in voice.available_qualities
             ],
-            "best_quality": voice.best_quality.value if voice.best_quality else None,
+            "best_quality": voice.quality_values[0] if voice.quality_values else None,
         }
 
+    def get_all_voices(self) -> List[FlatVoiceEntry]:
+        """Get flat list of all voices"""
+        return self.catalog.list_all_voices()
+
     def get_full_catalog(self) -> Dict[str, Any]:
         """Get complete voice catalog"""
         return self.catalog.get_full_catalog()
@@ -628,7 +1193,7 @@ class TTSService:
             "languages": len(self.catalog.languages),
             "locales": self.catalog.total_locales,
             "voices": self.catalog.total_voices,
-            "qualities": [q.value for q in Quality],
+            "qualities": QUALITY_VALUES,
         }
 
 
@@ -9,6 +9,8 @@ set -e
 MODELS_DIR="${MODELS_DIR:-./models}"
 VOICES_JSON_URL="https://huggingface.co/rhasspy/piper-voices/resolve/main/voices.json"
 BASE_URL="https://huggingface.co/rhasspy/piper-voices/resolve/main"
+# Number of voices downloaded at the same time
+DOWNLOAD_JOBS="${DOWNLOAD_JOBS:-3}"
 
 # Colors
 RED='\033[0;31m'
@@ -76,31 +78,21 @@ fi
 TOTAL_VOICES=$(jq 'keys | length' "$VOICES_JSON")
 log_ok "Downloaded voices.json ($TOTAL_VOICES voices)"
 
-# Parse and download all voices
-log_info "Starting downloads..."
-
-SUCCESS=0
-FAILED=0
-COUNTER=0
-
-# Get all voice keys
-VOICE_KEYS=$(jq -r 'keys[]' "$VOICES_JSON")
-
-for VOICE_KEY in $VOICE_KEYS; do
-    COUNTER=$((COUNTER + 1))
+# Download one voice (model + config); prints its progress line and records
+# the result in $RESULTS_FILE
+download_voice() {
+    local COUNTER="$1"
+    local VOICE_KEY="$2"
     
     # Parse voice key: lang_REGION-name-quality
     # Example: en_US-lessac-high
-    LANG_REGION=$(echo "$VOICE_KEY" | cut -d'-' -f1)
-    VOICE_NAME=$(echo "$VOICE_KEY" | cut -d'-' -f2)
-    QUALITY=$(echo "$VOICE_KEY" | cut -d'-' -f3)
-    
-    LANG=$(echo "$LANG_REGION" | cut -d'_' -f1)
-    REGION=$(echo "$LANG_REGION" | cut -d'_' -f2)
+    local LANG_REGION=$(echo "$VOICE_KEY" | cut -d'-' -f1)
+    local VOICE_NAME=$(echo "$VOICE_KEY" | cut -d'-' -f2)
+    local QUALITY=$(echo "$VOICE_KEY" | cut -d'-' -f3)
     
     # Get download paths from voices.json
-    MODEL_PATH=$(jq -r --arg key "$VOICE_KEY" '.[$key].files | to_entries[] | select(.key | endswith(".onnx") and (endswith(".json") | not)) | .value.rhasspy // .key' "$VOICES_JSON" | head -1)
-    CONFIG_PATH=$(jq -r --arg key "$VOICE_KEY" '.[$key].files | to_entries[] | select(.key | endswith(".onnx.json")) | .value.rhasspy // .key' "$VOICES_JSON" | head -1)
+    local MODEL_PATH=$(jq -r --arg key "$VOICE_KEY" '.[$key].files | to_entries[] | select(.key | endswith(".onnx") and (endswith(".json") | not)) | .value.rhasspy // .key' "$VOICES_JSON" | head -1)
+    local CONFIG_PATH=$(jq -r --arg key "$VOICE_KEY" '.[$key].files | to_entries[] | select(.key | endswith(".onnx.json")) | .value.rhasspy // .key' "$VOICES_JSON" | head -1)
     
     # Construct URLs
     if [[ -z "$MODEL_PATH" || "$MODEL_PATH" == "null" ]]; then
@@ -110,41 +102,60 @@ for VOICE_KEY in $VOICE_KEYS; do
         CONFIG_PATH="${LANG_REGION}/${VOICE_NAME}/${QUALITY}/${VOICE_KEY}.onnx.json"
     fi
     
-    MODEL_URL="${BASE_URL}/${MODEL_PATH}"
-    CONFIG_URL="${BASE_URL}/${CONFIG_PATH}"
+    local MODEL_URL="${BASE_URL}/${MODEL_PATH}"
+    local CONFIG_URL="${BASE_URL}/${CONFIG_PATH}"
     
-    MODEL_FILE="$MODELS_DIR/${VOICE_KEY}.onnx"
-    CONFIG_FILE="$MODELS_DIR/${VOICE_KEY}.onnx.json"
-    
-    printf "[%d/%d] %s  " "$COUNTER" "$TOTAL_VOICES" "$VOICE_KEY"
+    local MODEL_FILE="$MODELS_DIR/${VOICE_KEY}.onnx"
+    local CONFIG_FILE="$MODELS_DIR/${VOICE_KEY}.onnx.json"
     
     # Download model file if not exists
     if [[ ! -f "$MODEL_FILE" ]]; then
-        if curl -sL --fail "$MODEL_URL" -o "$MODEL_FILE" 2>/dev/null; then
-            :
-        else
+        if ! curl -sL --fail "$MODEL_URL" -o "$MODEL_FILE" 2>/dev/null; then
             rm -f "$MODEL_FILE"
-            echo -e "${RED}[failed]${NC}"
-            FAILED=$((FAILED + 1))
-            continue
+            printf "[%d/%d] %s  ${RED}[failed]${NC}\n" "$COUNTER" "$TOTAL_VOICES" "$VOICE_KEY"
+            echo "failed" >> "$RESULTS_FILE"
+            return
         fi
     fi
     
     # Download config file if not exists
     if [[ ! -f "$CONFIG_FILE" ]]; then
-        if curl -sL --fail "$CONFIG_URL" -o "$CONFIG_FILE" 2>/dev/null; then
-            :
-        else
+        if ! curl -sL --fail "$CONFIG_URL" -o "$CONFIG_FILE" 2>/dev/null; then
             rm -f "$CONFIG_FILE"
-            echo -e "${RED}[failed]${NC}"
-            FAILED=$((FAILED + 1))
-            continue
+            printf "[%d/%d] %s  ${RED}[failed]${NC}\n" "$COUNTER" "$TOTAL_VOICES" "$VOICE_KEY"
+            echo "failed" >> "$RESULTS_FILE"
+            return
         fi
     fi
     
-    echo -e "${GREEN}[downloaded]${NC}"
-    SUCCESS=$((SUCCESS + 1))
+    printf "[%d/%d] %s  ${GREEN}[downloaded]${NC}\n" "$COUNTER" "$TOTAL_VOICES" "$VOICE_KEY"
+    echo "ok" >> "$RESULTS_FILE"
+}
+
+# Parse and download all voices, DOWNLOAD_JOBS at a time
+log_info "Starting downloads ($DOWNLOAD_JOBS in parallel)..."
+
+RESULTS_FILE=$(mktemp)
+COUNTER=0
+
+# Get all voice keys
+VOICE_KEYS=$(jq -r 'keys[]' "$VOICES_JSON")
+
+for VOICE_KEY in $VOICE_KEYS; do
+    COUNTER=$((COUNTER + 1))
+    
+    # Wait for a free download slot
+    while [[ $(jobs -rp | wc -l) -ge $DOWNLOAD_JOBS ]]; do
+        wait -n || true
+    done
+    
+    download_voice "$COUNTER" "$VOICE_KEY" &
 done
+wait
+
+SUCCESS=$(grep -c '^ok$' "$RESULTS_FILE" || true)
+FAILED=$(grep -c '^failed$' "$RESULTS_FILE" || true)
+rm -f "$RESULTS_FILE"
 
 echo ""
 log_info "========================================="
@@ -162,8 +173,12 @@ log_info "Generating hierarchical voice index..."
 # Create index using bash and jq
 INDEX_FILE="$MODELS_DIR/voice_index.json"
 
+# Build the index next to the live one and swap it in once complete, so a
+# running server never reads an empty or partial index
+BUILD_FILE="${INDEX_FILE}.building"
+
 # Initialize structure
-echo '{"languages":{}}' > "$INDEX_FILE"
+echo '{"languages":{}}' > "$BUILD_FILE"
 
 # Process each downloaded model
 for MODEL_FILE in "$MODELS_DIR"/*.onnx; do
@@ -196,14 +211,14 @@ for MODEL_FILE in "$MODELS_DIR"/*.onnx; do
         if .languages[$lang] == null then
             .languages[$lang] = {"locales": {}}
         else . end
-    ' "$INDEX_FILE" > "${INDEX_FILE}.tmp" && mv "${INDEX_FILE}.tmp" "$INDEX_FILE"
+    ' "$BUILD_FILE" > "${BUILD_FILE}.tmp" && mv "${BUILD_FILE}.tmp" "$BUILD_FILE"
     
     # Ensure locale exists
     jq --arg lang "$LANG" --arg loc "$REGION" '
         if .languages[$lang].locales[$loc] == null then
             .languages[$lang].locales[$loc] = {"voices": {}}
         else . end
-    ' "$INDEX_FILE" > "${INDEX_FILE}.tmp" && mv "${INDEX_FILE}.tmp" "$INDEX_FILE"
+    ' "$BUILD_FILE" > "${BUILD_FILE}.tmp" && mv "${BUILD_FILE}.tmp" "$BUILD_FILE"
     
     # Ensure voice exists
     jq --arg lang "$LANG" --arg loc "$REGION" --arg voice "$VOICE_NAME" --arg gender "$GENDER" --arg display "$DISPLAY_NAME" '
@@ -215,7 +230,7 @@ for MODEL_FILE in "$MODELS_DIR"/*.onnx; do
                 "qualities": {}
             }
         else . end
-    ' "$INDEX_FILE" > "${INDEX_FILE}.tmp" && mv "${INDEX_FILE}.tmp" "$INDEX_FILE"
+    ' "$BUILD_FILE" > "${BUILD_FILE}.tmp" && mv "${BUILD_FILE}.tmp" "$BUILD_FILE"
     
     # Add quality variant
     jq --arg lang "$LANG" \
@@ -232,10 +247,13 @@ for MODEL_FILE in "$MODELS_DIR"/*.onnx; do
             "sample_rate": $sample_rate,
             "num_speakers": $num_speakers
         }
-    ' "$INDEX_FILE" > "${INDEX_FILE}.tmp" && mv "${INDEX_FILE}.tmp" "$INDEX_FILE"
+    ' "$BUILD_FILE" > "${BUILD_FILE}.tmp" && mv "${BUILD_FILE}.tmp" "$BUILD_FILE"
     
 done
 
+# Publish the complete index in one rename
+mv "$BUILD_FILE" "$INDEX_FILE"
+
 # Count results
 LANG_COUNT=$(jq '.languages | keys | length' "$INDEX_FILE")
 VOICE_COUNT=$(jq '[.languages[].locales[].voices | keys | length] | add' "$INDEX_FILE")
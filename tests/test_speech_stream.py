@@ -0,0 +1,67 @@
+# test_speech_stream.py
+# Path: /root/piper/tests/test_speech_stream.py
+# Speech stream lifecycle: closing a stream early must release its resources
+#
+# Run from the repository root: python -m unittest discover -s tests
+
+import asyncio
+import os
+import sys
+import tempfile
+import unittest
+from pathlib import Path
+
+os.environ.setdefault("LOG_DIR", tempfile.mkdtemp(prefix="piper-test-logs-"))
+os.environ.setdefault("LOG_LEVEL", "WARNING")
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / "app"))
+
+from config import VoiceVariant, Quality  # noqa: E402
+from tts_service import TTSService  # noqa: E402
+
+# 0.1 s of 16-bit silence at 22050 Hz per segment
+SEGMENT_PCM = b"\x00\x00" * 2205
+
+TEXT = " ".join(f"Sentence number {i}." for i in range(20))
+
+
+class SpeechStreamCloseTest(unittest.IsolatedAsyncioTestCase):
+    """Streams closed by the client after the first chunk"""
+
+    async def asyncSetUp(self):
+        self.service = TTSService()
+        variant = VoiceVariant(
+            quality=Quality.LOW,
+            model_file="en_US-test-low.onnx",
+            config_file="en_US-test-low.onnx.json",
+        )
+        # Resolve every request to the test voice and synthesize without a model
+        self.service._resolve_voice_hierarchy = lambda **_: (None, None, None, variant)
+
+        async def synthesize(text: str, **_) -> bytes:
+            await asyncio.sleep(0)
+            return SEGMENT_PCM
+
+        self.service._synthesize = synthesize
+
+    async def asyncTearDown(self):
+        self.service.shutdown()
+
+    async def test_aclose_after_first_chunk_releases_request(self):
+        for i in range(10):
+            stream = await self.service.generate_speech(
+                text=f"{TEXT} Run {i}.", language="en", audio_format="pcm",
+            )
+            chunks = stream.chunks
+            self.assertEqual(await chunks.__anext__(), SEGMENT_PCM)
+            await chunks.aclose()
+
+            # Let the cancelled producer finish
+            for _ in range(10):
+                await asyncio.sleep(0)
+
+            self.assertEqual(self.service.limiter.requests, 0)
+            self.assertEqual(self.service._inflight, {})
+
+
+if __name__ == "__main__":
+    unittest.main()